@@ -0,0 +1,38 @@
+'''Micro-benchmark of `src.timestamps.parse_datetime` against `dateutil.parser.parse`.
+
+Run from the backend directory:
+    python -m benchmarks.bench_timestamps
+'''
+from timeit import repeat
+
+from dateutil import parser
+
+from src.helpers import datetime_UTC
+from src.timestamps import parse_datetime
+
+SAMPLES = {
+    'RFC 822 (phys.org pubDate)': 'Wed, 14 May 2025 13:00:02 -0400',
+    'ISO 8601 (SNAPI published_at)': '2025-05-14T13:00:02.123456Z',
+    'EPIC date': '2025-05-14 13:00:02',
+}
+NUMBER = 20_000
+
+
+def _best(stmt) -> float:
+    '''Returns the best per-call time in microseconds.'''
+    return min(repeat(stmt, number=NUMBER, repeat=5)) / NUMBER * 1e6
+
+
+def main():
+    uncached = parse_datetime.__wrapped__
+    print(f'{"format":32}{"dateutil":>12}{"fast path":>12}{"memoized":>12}{"speedup":>10}')
+    for label, value in SAMPLES.items():
+        assert uncached(value) == datetime_UTC(parser.parse(value))
+        dateutil_us = _best(lambda: datetime_UTC(parser.parse(value)))
+        fast_us = _best(lambda: uncached(value))
+        memo_us = _best(lambda: parse_datetime(value))
+        print(f'{label:32}{dateutil_us:>10.2f}us{fast_us:>10.2f}us{memo_us:>10.2f}us{dateutil_us / fast_us:>9.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,21 +1,41 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
 from slowapi.middleware import SlowAPIMiddleware
 from slowapi.errors import RateLimitExceeded
 from fastapi.middleware.httpsredirect import HTTPSRedirectMiddleware
-from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.middleware.cors import CORSMiddleware
 
 import os
 from dotenv import load_dotenv
 
+from src.apis import schedule_EPIC_refresh, schedule_news_ingestion, schedule_rover_status_refresh
+from src.client import http_client_lifespan
 from src.routers import news, imagery
+from src.scheduler import Scheduler
+from src.streaming import StreamingGZipMiddleware
 
 # Setup app
 load_dotenv()
 PROD = os.getenv('PROD')
 DEV = os.getenv('DEV')
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    '''Opens the shared upstream HTTP client pool and runs background jobs while the app is running.'''
+    async with http_client_lifespan():
+        scheduler = Scheduler()
+        schedule_news_ingestion(scheduler)
+        schedule_rover_status_refresh(scheduler)
+        schedule_EPIC_refresh(scheduler)
+        scheduler.start()
+        try:
+            yield
+        finally:
+            await scheduler.stop()
+
 description = '''
 ### API for all things space
 Space news, epihermes, other info and more!
@@ -39,6 +59,7 @@ app = FastAPI(title='The Space Prime API',
                   "name": "MIT License",
                   "identifier": "MIT",
               },
+              lifespan=lifespan
               )
 app.include_router(news.router, responses={
                    429: {
@@ -73,5 +94,6 @@ app.add_middleware(SlowAPIMiddleware)
 # Setup middlewares
 if PROD:
     app.add_middleware(HTTPSRedirectMiddleware)
-app.add_middleware(GZipMiddleware)
-app.add_middleware(CORSMiddleware, allow_origins=['*'], allow_headers=['*'])
+app.add_middleware(StreamingGZipMiddleware)
+app.add_middleware(CORSMiddleware, allow_origins=['*'], allow_headers=['*'],
+                   expose_headers=['X-Next-Cursor', 'ETag'])
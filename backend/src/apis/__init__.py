@@ -1,2 +1,2 @@
-from .get_articles import get_all_articles, get_industry_articles, get_science_articles
-from .get_imagery import get_EPIC_API_images, get_mars_photo_API_images, get_mars_photo_API_metadata
+from .get_articles import decode_article_cursor, encode_article_cursor, get_all_articles, get_industry_articles, get_science_articles, schedule_news_ingestion
+from .get_imagery import get_EPIC_API_images, get_MP_API_images, get_MP_API_metadata, iter_EPIC_API_images, iter_MP_API_images, iter_MP_API_metadata, schedule_EPIC_refresh, schedule_rover_status_refresh
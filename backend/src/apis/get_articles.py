@@ -1,37 +1,71 @@
-from bs4 import BeautifulSoup, ResultSet
-from datetime import datetime
+import asyncio
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from bisect import bisect_right
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, UTC
+from functools import partial
+import heapq
+import json
+from itertools import islice
+from operator import attrgetter
+from typing import Awaitable, Callable, Iterable, Self
 
 from pydantic import AwareDatetime
 
+from src.article_store import ArticleStore
 from src.models import Article
-from dateutil import parser
-from src.helpers import request_get_json, datetime_UTC, REQUEST_HEADERS, request_get_json_cached
-from itertools import chain
-from requests_cache import CachedSession
+from src.helpers import datetime_UTC, REQUEST_HEADERS, request_get_conditional, request_get_json_cached, timed
+from src.rss import iter_rss_items
+from src.scheduler import Scheduler
+from src.timestamps import parse_datetime
 
 
-def get_SNAPI_articles(earliest_datetime: str) -> list[Article]:
-    '''Return extracted industry news articles from SNAPI.'''
+SNAPI_URL = 'https://api.spaceflightnewsapi.net/v4/articles'
+SNAPI_PAGE_SIZE = 100
+SNAPI_MAX_CONCURRENT_PAGES = 4
+# Queries are widened to start at this boundary, so every query within it shares cached pages
+SNAPI_WINDOW = timedelta(days=1)
+
+
+def get_SNAPI_window_start(earliest_datetime: AwareDatetime, window: timedelta = SNAPI_WINDOW) -> datetime:
+    '''Returns the start of the window containing a datetime, with windows aligned to the Unix epoch in UTC.'''
+    timestamp = datetime_UTC(earliest_datetime).timestamp()
+    window_seconds = window.total_seconds()
+    return datetime.fromtimestamp(timestamp // window_seconds * window_seconds, UTC)
+
+
+async def get_SNAPI_articles(earliest_datetime: AwareDatetime, page_size: int = SNAPI_PAGE_SIZE, max_concurrent_pages: int = SNAPI_MAX_CONCURRENT_PAGES) -> list[Article]:
+    '''Return extracted industry news articles from SNAPI, newest first.
+    Articles are requested from the start of the window containing `earliest_datetime`, so overlapping queries (from any client or worker) share the same cached pages, and are then filtered for `earliest_datetime`.
+    After the first page, the remaining pages are fetched concurrently (at most `max_concurrent_pages` at a time) and every page is cached.'''
 
     # Get industry space news articles from SNAPI call
-    url = 'https://api.spaceflightnewsapi.net/v4/articles'
     # published_at_gte refers to all documents published after a given ISO8601 timestamp (included)
-    params = {'published_at_gte': earliest_datetime, 'limit': 20}
-    with CachedSession() as session:
-        results = request_get_json_cached(url, session, params=params)
-
-        # Paginate through all the results of query
-        items = []
-        if results and 'results' in results:
-            nextURL = results.get('next')
-            while nextURL:
-                # Requesting next data
-                nextResults = request_get_json(nextURL)
-                # Adding to the original results dictionary
-                results['results'] += nextResults['results']
-                # Updating the next URL
-                nextURL = nextResults.get('next')
-            items = results['results']
+    # Ordering keeps pages stable, so each offset is a distinct cacheable query
+    params = {'published_at_gte': get_SNAPI_window_start(earliest_datetime),
+              'ordering': '-published_at',
+              'limit': page_size}
+    results = await request_get_json_cached(SNAPI_URL, params=params)
+
+    # Paginate through all the results of query
+    items = []
+    if results and 'results' in results:
+        # Copy the first page, since cached content is read-only
+        items = list(results['results'])
+        semaphore = asyncio.Semaphore(max_concurrent_pages)
+
+        async def _get_page(offset: int) -> list[dict]:
+            '''Requests the page of results starting at an offset.'''
+            async with semaphore:
+                page = await request_get_json_cached(SNAPI_URL, params={**params, 'offset': offset})
+            return page['results']
+
+        # Compute remaining offsets from the total count and request them all at once
+        offsets = range(page_size, results['count'], page_size)
+        pages = await asyncio.gather(*(_get_page(offset) for offset in offsets))
+        for page in pages:
+            items += page
 
     # Extract data from results
     articles = [Article(title=item['title'],
@@ -39,92 +73,255 @@ def get_SNAPI_articles(earliest_datetime: str) -> list[Article]:
                         author=item['news_site'],
                         image=item['image_url'],
                         url=item['url'],
-                        timestamp=datetime.fromisoformat(
+                        timestamp=parse_datetime(
                             item['published_at']).timestamp(),
                         category='Industry')
                 for item in items]
-    return articles
-
-
-def get_physorg_articles(earliest_datetime: AwareDatetime) -> list[Article]:
-    '''Scrapes phys.org RSS feeds and returns a list of articles.'''
-
-    def _get_physorg_items(url: str, session: CachedSession) -> ResultSet:
-        '''Extracts articles from a given phys.org RSS feed.'''
-        # Get RSS Feed items
-        res = session.get(url, headers=REQUEST_HEADERS, timeout=10)
-        res.raise_for_status()
-        soup = BeautifulSoup(res.text, 'xml')
-        items = soup.find_all('item')
-        return items
-
-    # Extract articles from RSS feeds
-    with CachedSession() as session:
-        astrobiologyItems = _get_physorg_items(
-            'https://phys.org/rss-feed/space-news/astrobiology', session)
-        astronomyItems = _get_physorg_items(
-            'https://phys.org/rss-feed/space-news/astronomy', session)
-        planetarySciItems = _get_physorg_items(
-            'https://phys.org/rss-feed/space-news/planetary-sciences', session)
-    items = chain(astrobiologyItems, astronomyItems, planetarySciItems)
-
-    # Extract data from items
-    articleDict = {}
+
+    # Keep the articles after earliest datetime, which are a prefix of the (newest first) window
+    articles.sort(key=attrgetter('timestamp'), reverse=True)
+    earliest = datetime_UTC(earliest_datetime).timestamp()
+    end = bisect_right(articles, -earliest,
+                       key=lambda article: -article.timestamp)
+    return articles[:end]
+
+
+PHYSORG_FEEDS = {
+    'physorg_astrobiology': 'https://phys.org/rss-feed/space-news/astrobiology',
+    'physorg_astronomy': 'https://phys.org/rss-feed/space-news/astronomy',
+    'physorg_planetary_sciences': 'https://phys.org/rss-feed/space-news/planetary-sciences',
+}
+
+
+@dataclass(kw_only=True)
+class NewsBatch:
+    '''Articles fetched from a news source, with the feed ingestion state to save along with them.
+        Attributes:
+            articles (dict[str, Article]): New articles keyed by URL.
+            seen_guids (set[str]): Guids of the feed items processed, to skip in later polls.
+            feed_validators (dict[str, tuple[str | None, str | None]]): `ETag` and `Last-Modified` values of each changed feed's response, keyed by feed URL.
+    '''
+    articles: dict[str, Article] = field(default_factory=dict)
+    seen_guids: set[str] = field(default_factory=set)
+    feed_validators: dict[str, tuple[str | None, str | None]] = field(default_factory=dict)
+
+    def merge(self, other: Self) -> None:
+        '''Adds another batch's articles (keeping already added ones for the same URL) and ingestion state.'''
+        for url, article in other.articles.items():
+            self.articles.setdefault(url, article)
+        self.seen_guids |= other.seen_guids
+        self.feed_validators.update(other.feed_validators)
+
+
+async def get_physorg_feed_articles(feed_url: str, earliest_datetime: AwareDatetime) -> NewsBatch:
+    '''Scrapes a phys.org RSS feed and returns its new articles, with the guids processed and the feed's validators.
+    The feed is requested conditionally, and items seen in previous requests aren't extracted again.
+    Nothing is saved here: the state is saved along with the articles by `poll_news_source`.'''
+
+    # Get RSS Feed items, unless the feed hasn't changed since the last request
+    etag, last_modified = ARTICLE_STORE.get_feed_validators(feed_url)
+    res = await request_get_conditional(feed_url,
+                                        etag=etag,
+                                        last_modified=last_modified,
+                                        headers=REQUEST_HEADERS)
+    if res is None:
+        return NewsBatch()
+
+    # Extract data from items as they are parsed
+    batch = NewsBatch()
     earliest = datetime_UTC(earliest_datetime)
-    for item in items:
-        # Skip if article has already been extracted
-        if item.guid.text in articleDict:
+    for item in iter_rss_items(res.content):
+        # Skip if article has been seen before or already been extracted
+        if item.guid in batch.seen_guids or ARTICLE_STORE.is_seen(item.guid):
             continue
-        # Skip 'Space Exploration' articles
-        category = item.category.text.strip()
-        if 'Space Exploration' in category:
-            continue
-        # Skip article if before earliest datetime (NO DB YET)
-        dt = datetime_UTC(parser.parse(item.pubDate.text))
+        # Stop at the first article before earliest datetime (the backfill window),
+        # since phys.org feeds are ordered newest first
+        dt = parse_datetime(item.pub_date)
         if dt < earliest:
+            break
+        batch.seen_guids.add(item.guid)
+        # Skip 'Space Exploration' articles
+        if 'Space Exploration' in item.category:
             continue
-        ts = dt.timestamp()
         # Extract data for articles
-        title = item.title.text.strip()
-        content = item.description.text.strip()
-        author = 'phys.org'
-        url = item.link.text
-        image = item.thumbnail['url']
-        article = Article(title=title,
-                          content=content,
-                          author=author,
-                          image=image,
-                          url=url,
-                          timestamp=ts,
-                          category=category)
-        articleDict[item.guid.text] = article
-    articles = articleDict.values()
-    return articles
-
-
-def get_industry_articles(earliest_datetime: AwareDatetime, limit: int | None = None):
-    '''Aggregates and returns space industry news articles.'''
-    SNAPIArticles = get_SNAPI_articles(earliest_datetime)
-    articles = list(chain(SNAPIArticles))
-    return sorted(articles,
-                  key=lambda x: x.timestamp,
-                  reverse=True)[:limit]
-
-
-def get_science_articles(earliest_datetime: AwareDatetime, limit: int | None = None) -> list[Article]:
-    '''Aggregates and returns space science news articles.'''
-    physOrgArticles = get_physorg_articles(earliest_datetime)
-    articles = list(chain(physOrgArticles))
-    return sorted(articles,
-                  key=lambda x: x.timestamp,
-                  reverse=True)[:limit]
-
-
-def get_all_articles(earliest_datetime: AwareDatetime, limit: int | None = None):
-    '''Aggregates and returns all space news articles.'''
-    industryArticles = get_industry_articles(earliest_datetime)
-    scienceArticles = get_science_articles(earliest_datetime)
-    articles = list(chain(industryArticles, scienceArticles))
-    return sorted(articles,
-                  key=lambda x: x.timestamp,
-                  reverse=True)[:limit]
+        article = Article(title=item.title,
+                          content=item.description,
+                          author='phys.org',
+                          image=item.thumbnail or '',
+                          url=item.link,
+                          timestamp=dt.timestamp(),
+                          category=item.category)
+        batch.articles.setdefault(article.url, article)
+
+    # Remember the validators for the next request
+    batch.feed_validators[feed_url] = (res.headers.get('ETag'),
+                                       res.headers.get('Last-Modified'))
+    return batch
+
+
+async def get_physorg_articles(earliest_datetime: AwareDatetime, timings: dict[str, float] | None = None) -> NewsBatch:
+    '''Scrapes phys.org RSS feeds concurrently and returns their articles, with the feeds' ingestion state.'''
+
+    batch = NewsBatch()
+
+    async def _merge_feed(name: str, url: str):
+        '''Merges a feed's articles as soon as it arrives.'''
+        feedBatch = await timed(name, get_physorg_feed_articles(url, earliest_datetime), timings)
+        # Articles already extracted from another feed are skipped
+        batch.merge(feedBatch)
+
+    # Fetch all feeds at once (remaining feeds are cancelled if one fails)
+    async with asyncio.TaskGroup() as tg:
+        for name, url in PHYSORG_FEEDS.items():
+            tg.create_task(_merge_feed(name, url))
+    return batch
+
+
+async def _fetch_SNAPI_articles(earliest_datetime: AwareDatetime, timings: dict[str, float]) -> NewsBatch:
+    '''Fetches SNAPI articles, recording the fetch duration.'''
+    articles = await timed('snapi', get_SNAPI_articles(earliest_datetime), timings)
+    return NewsBatch(articles={article.url: article for article in articles})
+
+
+async def _fetch_physorg_articles(earliest_datetime: AwareDatetime, timings: dict[str, float]) -> NewsBatch:
+    '''Fetches phys.org articles, recording each feed's fetch duration.'''
+    return await get_physorg_articles(earliest_datetime, timings)
+
+
+@dataclass(frozen=True, kw_only=True)
+class NewsSource:
+    '''A news source polled in the background and stored in `ARTICLE_STORE`.
+        Attributes:
+            name (str): Unique name of the source, used as its key in the store.
+            fetch (Callable[[AwareDatetime, dict[str, float]], Awaitable[NewsBatch]]): Coroutine function returning articles published after a datetime (with their ingestion state) and recording fetch durations.
+            interval (float): Seconds between polls.
+            incremental (bool): Whether polls only fetch articles newer than the source's newest stored one. Otherwise polls reach back to `NEWS_BACKFILL` (e.g. for sources merging several feeds, where one feed's newest article says nothing about the others').
+    '''
+    name: str
+    fetch: Callable[[AwareDatetime, dict[str, float]],
+                    Awaitable[NewsBatch]]
+    interval: float
+    incremental: bool = True
+
+
+SNAPI_SOURCE = NewsSource(name='snapi',
+                          fetch=_fetch_SNAPI_articles,
+                          interval=5 * 60)
+# Feeds skip items seen in earlier polls instead
+PHYSORG_SOURCE = NewsSource(name='physorg',
+                            fetch=_fetch_physorg_articles,
+                            interval=10 * 60,
+                            incremental=False)
+INDUSTRY_SOURCES = (SNAPI_SOURCE,)
+SCIENCE_SOURCES = (PHYSORG_SOURCE,)
+NEWS_SOURCES = INDUSTRY_SOURCES + SCIENCE_SOURCES
+
+# How far back the first poll of an empty store (or every poll of a non-incremental source) reaches
+NEWS_BACKFILL = timedelta(days=30)
+ARTICLE_STORE = ArticleStore()
+# Source name -> fetch durations of the source's latest poll
+_SOURCE_TIMINGS: dict[str, dict[str, float]] = {}
+_source_locks: defaultdict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
+
+
+async def poll_news_source(source: NewsSource, *, if_unpolled: bool = False) -> None:
+    '''Fetches a source's new articles into `ARTICLE_STORE`.
+    If `if_unpolled` is set, nothing is fetched when the source has already been polled.'''
+    async with _source_locks[source.name]:
+        if if_unpolled and source.name in _SOURCE_TIMINGS:
+            return
+        # Only fetch articles newer than the ones already stored, if the source is incremental
+        latest = ARTICLE_STORE.latest_timestamp(source.name) if source.incremental else None
+        if latest is None:
+            since = datetime.now(UTC) - NEWS_BACKFILL
+        else:
+            since = datetime.fromtimestamp(latest, UTC)
+        timings = {}
+        try:
+            batch = await source.fetch(since, timings)
+        except Exception:
+            # Don't report the durations of an earlier poll as the latest ones
+            _SOURCE_TIMINGS.pop(source.name, None)
+            raise
+        # Save the articles and the state of the feeds they came from together
+        ARTICLE_STORE.ingest(source.name, batch.articles.values(),
+                             batch.seen_guids, batch.feed_validators)
+        _SOURCE_TIMINGS[source.name] = timings
+
+
+def schedule_news_ingestion(scheduler: Scheduler) -> None:
+    '''Adds a polling job for every news source to a scheduler.'''
+    for source in NEWS_SOURCES:
+        scheduler.add_job(f'poll_{source.name}',
+                          partial(poll_news_source, source),
+                          source.interval)
+
+
+def get_article_key(article: Article) -> tuple[float, str]:
+    '''Returns the (timestamp, URL) key articles are paginated by, newest first.'''
+    return article.timestamp, article.url
+
+
+def encode_article_cursor(article: Article) -> str:
+    '''Creates an opaque cursor for resuming pagination after an article.'''
+    return urlsafe_b64encode(json.dumps(get_article_key(article), separators=(',', ':')).encode()).decode()
+
+
+def decode_article_cursor(cursor: str) -> tuple[float, str]:
+    '''Returns the (timestamp, URL) key of the article a cursor resumes after, raising `ValueError` if it's invalid.'''
+    try:
+        timestamp, url = json.loads(urlsafe_b64decode(cursor))
+    except (ValueError, TypeError) as e:
+        raise ValueError(f'Invalid cursor: {cursor}') from e
+    if not isinstance(timestamp, (int, float)) or not isinstance(url, str):
+        raise ValueError(f'Invalid cursor: {cursor}')
+    return float(timestamp), url
+
+
+async def _query_articles(
+        sources: Iterable[NewsSource],
+        earliest_datetime: AwareDatetime,
+        limit: int | None,
+        timings: dict[str, float] | None,
+        after: tuple[float, str] | None
+) -> list[Article]:
+    '''Returns the newest stored articles of the given sources, resuming after the `after` key if given.'''
+    # Poll on the request path only if the scheduler hasn't polled a source yet and nothing of it is stored
+    # Otherwise (or if the poll fails) stored articles are served regardless of upstream health
+    unpolled = [source for source in sources
+                if source.name not in _SOURCE_TIMINGS and ARTICLE_STORE.latest_timestamp(source.name) is None]
+    results = await asyncio.gather(*(poll_news_source(source, if_unpolled=True) for source in unpolled),
+                                   return_exceptions=True)
+    for source, result in zip(unpolled, results):
+        if isinstance(result, Exception):
+            print(f'News poll for "{source.name}" failed: {result}')  # TODO: logging
+    if timings is not None:
+        for source in sources:
+            timings.update(_SOURCE_TIMINGS.get(source.name, {}))
+    # Each source is already sorted newest first, so k-way merge them and stop after the newest `limit`
+    earliest = datetime_UTC(earliest_datetime).timestamp()
+    streams = [ARTICLE_STORE.iter_newest(source.name, earliest, limit, after)
+               for source in sources]
+    merged = heapq.merge(*streams, key=get_article_key, reverse=True)
+    return list(islice(merged, limit))
+
+
+async def get_industry_articles(earliest_datetime: AwareDatetime, limit: int | None = None, timings: dict[str, float] | None = None, after: tuple[float, str] | None = None) -> list[Article]:
+    '''Aggregates and returns space industry news articles from the article store.
+    If `timings` is given, the fetch durations of the sources' latest polls are recorded in it.
+    If `after` is given (see `decode_article_cursor`), articles resume after that (timestamp, URL) key.'''
+    return await _query_articles(INDUSTRY_SOURCES, earliest_datetime, limit, timings, after)
+
+
+async def get_science_articles(earliest_datetime: AwareDatetime, limit: int | None = None, timings: dict[str, float] | None = None, after: tuple[float, str] | None = None) -> list[Article]:
+    '''Aggregates and returns space science news articles from the article store.
+    If `timings` is given, the fetch durations of the sources' latest polls are recorded in it.
+    If `after` is given (see `decode_article_cursor`), articles resume after that (timestamp, URL) key.'''
+    return await _query_articles(SCIENCE_SOURCES, earliest_datetime, limit, timings, after)
+
+
+async def get_all_articles(earliest_datetime: AwareDatetime, limit: int | None = None, timings: dict[str, float] | None = None, after: tuple[float, str] | None = None) -> list[Article]:
+    '''Aggregates and returns all space news articles from the article store.
+    If `timings` is given, the fetch durations of the sources' latest polls are recorded in it.
+    If `after` is given (see `decode_article_cursor`), articles resume after that (timestamp, URL) key.'''
+    return await _query_articles(NEWS_SOURCES, earliest_datetime, limit, timings, after)
@@ -1,25 +1,153 @@
+import asyncio
+from bisect import bisect_left, bisect_right
 from collections import deque
+from dataclasses import dataclass
 from datetime import date
-from dateutil import parser
-from requests_cache import CachedSession
-from src.helpers import datetime_UTC, request_get_json_cached
-from src.models import EPICAPICollectionType, EPICAPIImageType, EPICAPIImage, MarsPhotoAPICamera, MarsPhotoAPIRoverType, MarsPhotoAPICameraType, MarsPhotoAPICamera, MarsPhotoAPIImage, MarsPhotoAPIMetadataManifest, MarsPhotoAPIMetadata, EPICAPIGeoCoordinate, EPICAPI3DCoordinate, EPICAPIQuaternions, MARS_PHOTO_API_DATA, MARS_PHOTO_API_ROVERS
+from functools import cached_property, partial
+import math
+from types import MappingProxyType
+from typing import Any, AsyncIterator, Mapping
+from src.helpers import request_get_json_cached, single_flight
+from src.manifest_index import ManifestIndex, ManifestIndexCache
+from src.rover_snapshot import RoverSnapshot
+from src.scheduler import Scheduler
+from src.timestamps import parse_datetime
+from src.models import EPICAPICollectionType, EPICAPIImageType, EPICAPIImage, MarsPhotoAPICamera, MarsPhotoAPIRoverType, MarsPhotoAPICameraType, MarsPhotoAPICamera, MarsPhotoAPIImage, MarsPhotoAPIMetadata, MarsPhotoAPIRover, EPICAPIGeoCoordinate, EPICAPI3DCoordinate, EPICAPIQuaternions, MARS_PHOTO_API_DATA, MARS_PHOTO_API_ROVERS
 
+# EPIC publishes new images a few times a day
+EPIC_REFRESH_INTERVAL = 30 * 60
+EPIC_MAX_CONCURRENT_DAYS = 4
 
-def get_EPIC_API_images(collection: EPICAPICollectionType, series: bool, image_type: EPICAPIImageType, image_date: date | None) -> deque[EPICAPIImage]:
-    '''Returns images of Earth from NASA's EPIC API.'''
+# Active rovers' manifests gain a sol about once a day
+MANIFEST_REFRESH_INTERVAL = 6 * 60 * 60
+MANIFEST_INDEXES = ManifestIndexCache(MANIFEST_REFRESH_INTERVAL)
 
-    # Call EPIC API
+# Inactive rovers' data never changes, so it's served from a local snapshot (if built) and never expires
+ROVER_SNAPSHOT = RoverSnapshot()
+SNAPSHOT_MANIFEST_INDEXES = ManifestIndexCache(math.inf)
+
+# Active rovers' status (current sol, date and total photos) changes about once a day
+ROVER_STATUS_INTERVAL = 60 * 60
+# Rover name -> rover with its latest status, replaced as a whole and never mutated
+_rover_status: Mapping[str, MarsPhotoAPIRover] | None = None
+
+
+@dataclass(frozen=True, kw_only=True)
+class EPICCollection:
+    '''Snapshot of an EPIC collection's available dates and latest series, replaced as a whole on refresh.
+        Attributes:
+            available_dates (list[str]): Sorted ISO 8601 dates that have images.
+            latest_date (str | None): ISO 8601 date of the latest series, if any.
+            latest_images (dict[EPICAPIImageType, list[EPICAPIImage]]): Images of the latest series per image type, oldest first.
+    '''
+    available_dates: list[str]
+    latest_date: str | None
+    latest_images: dict[EPICAPIImageType, list[EPICAPIImage]]
+
+    @cached_property
+    def available_date_set(self) -> frozenset[str]:
+        '''`available_dates` as a set for lookups.'''
+        return frozenset(self.available_dates)
+
+    def find_dates(self, start_date: date | None, end_date: date | None) -> list[str]:
+        '''Returns the dates with images in an inclusive range, oldest first. The range is open-ended if a bound isn't given.'''
+        dates = self.available_dates
+        if self.latest_date is not None and self.latest_date not in self.available_date_set:
+            dates = dates + [self.latest_date]
+        start = 0 if start_date is None else bisect_left(
+            dates, start_date.isoformat())
+        end = len(dates) if end_date is None else bisect_right(
+            dates, end_date.isoformat())
+        return dates[start:end]
+
+
+# Collection -> snapshot of its available dates and latest series
+_EPIC_collections: dict[EPICAPICollectionType, EPICCollection] = {}
+
+
+def _create_EPIC_API_image(collection: EPICAPICollectionType, image_type: EPICAPIImageType, item: dict[str, Any]) -> EPICAPIImage:
+    '''Creates an image object from an EPIC API image item.'''
+    # Format of date in item will always be "YYYY-MM-DD HH:MM:SS"
+    year = item['date'][:4]
+    month = item['date'][5:7]
+    day = item['date'][8:10]
+    # To get the URL of an image: https://epic.gsfc.nasa.gov/archive/(natural|enhanced|aersol|cloud)/YYYY/MM/DD/(png|jpg|thumbs)/<filename>
+    image_url = f"https://epic.gsfc.nasa.gov/archive/{collection}/{year}/{month}/{day}/{image_type}/{item['image']}.{image_type}"
+    # Create objects
+    ts = parse_datetime(item['date']).timestamp()
+    sat_view = EPICAPIGeoCoordinate(**item['centroid_coordinates'])
+    sat_pos = EPICAPI3DCoordinate(**item['dscovr_j2000_position'])
+    lunar_pos = EPICAPI3DCoordinate(**item['lunar_j2000_position'])
+    sun_pos = EPICAPI3DCoordinate(**item['sun_j2000_position'])
+    sat_attitude = EPICAPIQuaternions(**item['attitude_quaternions'])
+    return EPICAPIImage(image=image_url,
+                        timestamp=ts,
+                        dscovr_view_coordinates=sat_view,
+                        dscovr_j2000_position=sat_pos,
+                        lunar_j2000_position=lunar_pos,
+                        sun_j2000_position=sun_pos,
+                        dscovr_attitude=sat_attitude)
+
+
+async def refresh_EPIC_collection(collection: EPICAPICollectionType) -> EPICCollection:
+    '''Fetches an EPIC collection's available dates and latest series, and swaps in a new snapshot of them.'''
     url = f'https://epic.gsfc.nasa.gov/api/{collection}'
-    # Add date route if given
-    if image_date is not None:
-        url += f'/date/{image_date}'
-    with CachedSession() as session:
-        res = request_get_json_cached(url, session)
+    # Reuse responses another worker requested since the last refresh
+    available_dates, series = await asyncio.gather(request_get_json_cached(f'{url}/available', max_age=EPIC_REFRESH_INTERVAL),
+                                                   request_get_json_cached(url, max_age=EPIC_REFRESH_INTERVAL))
+    latest_images = {image_type: [_create_EPIC_API_image(collection, image_type, item) for item in series or ()]
+                     for image_type in EPICAPIImageType}
+    EPIC_collection = EPICCollection(available_dates=sorted(available_dates or ()),
+                                     latest_date=series[-1]['date'][:10] if series else None,
+                                     latest_images=latest_images)
+    _EPIC_collections[collection] = EPIC_collection
+    return EPIC_collection
+
+
+async def refresh_EPIC_collections() -> None:
+    '''Refreshes all EPIC collections at once. Collections that fail to refresh keep their previous snapshot.'''
+    collections = list(EPICAPICollectionType)
+    results = await asyncio.gather(*(refresh_EPIC_collection(collection) for collection in collections),
+                                   return_exceptions=True)
+    for collection, result in zip(collections, results):
+        if isinstance(result, Exception):
+            print(f'EPIC refresh for "{collection}" failed: {result}')  # TODO: logging
+
+
+async def get_EPIC_collection(collection: EPICAPICollectionType) -> EPICCollection:
+    '''Returns an EPIC collection's latest snapshot, refreshing it on the request path only if the scheduler hasn't yet.'''
+    EPIC_collection = _EPIC_collections.get(collection)
+    if EPIC_collection is None:
+        EPIC_collection = await single_flight(f'EPIC_collection:{collection}', partial(refresh_EPIC_collection, collection))
+    return EPIC_collection
+
 
-    # Return an empty deque if response is empty
+def schedule_EPIC_refresh(scheduler: Scheduler) -> None:
+    '''Adds a job refreshing the EPIC collection snapshots to a scheduler.'''
+    scheduler.add_job('refresh_EPIC_collections', refresh_EPIC_collections,
+                      EPIC_REFRESH_INTERVAL)
+
+
+async def _get_EPIC_API_day(EPIC_collection: EPICCollection, collection: EPICAPICollectionType, series: bool, image_type: EPICAPIImageType, day: str | None) -> list[EPICAPIImage]:
+    '''Returns a day's series, or only its latest image, from an EPIC collection.'''
+    # Latest images are precomputed
+    if day == EPIC_collection.latest_date:
+        images = EPIC_collection.latest_images[image_type]
+        return images if series else images[-1:]
+
+    # Skip days without images
+    if day not in EPIC_collection.available_date_set:
+        return []
+
+    # Call EPIC API, refreshing days that may still be getting images
+    # Their partial series aren't cached, since archived days are cached for a long time
+    url = f'https://epic.gsfc.nasa.gov/api/{collection}/date/{day}'
+    refresh = EPIC_collection.latest_date is None or day > EPIC_collection.latest_date
+    res = await request_get_json_cached(url, max_age=0 if refresh else None, cache=not refresh)
+
+    # Return an empty list if response is empty
     if not res:
-        return deque()
+        return []
 
     # Get all items if user requested a series
     if series:
@@ -28,119 +156,213 @@ def get_EPIC_API_images(collection: EPICAPICollectionType, series: bool, image_t
         data = [res[-1]]  # Latest of series
 
     # Extract data from image items
-    images = deque()
-    for item in data:
-        # Format of date in item will always be "YYYY-MM-DD HH:MM:SS"
-        year = item['date'][:4]
-        month = item['date'][5:7]
-        day = item['date'][8:10]
-        # To get the URL of an image: https://epic.gsfc.nasa.gov/archive/(natural|enhanced|aersol|cloud)/YYYY/MM/DD/(png|jpg|thumbs)/<filename>
-        image_url = f"https://epic.gsfc.nasa.gov/archive/{collection}/{year}/{month}/{day}/{image_type}/{item['image']}.{image_type}"
-        # Create objects
-        ts = datetime_UTC(parser.parse(item['date'])).timestamp()
-        sat_view = EPICAPIGeoCoordinate(**item['centroid_coordinates'])
-        sat_pos = EPICAPI3DCoordinate(**item['dscovr_j2000_position'])
-        lunar_pos = EPICAPI3DCoordinate(**item['lunar_j2000_position'])
-        sun_pos = EPICAPI3DCoordinate(**item['sun_j2000_position'])
-        sat_attitude = EPICAPIQuaternions(**item['attitude_quaternions'])
-        image = EPICAPIImage(image=image_url,
-                             timestamp=ts,
-                             dscovr_view_coordinates=sat_view,
-                             dscovr_j2000_position=sat_pos,
-                             lunar_j2000_position=lunar_pos,
-                             sun_j2000_position=sun_pos,
-                             dscovr_attitude=sat_attitude)
-        images.append(image)
-
-    return images
-
-
-def get_mars_photo_API_images(rovers: set[MarsPhotoAPIRoverType], cameras: set[MarsPhotoAPICameraType] | None, earth_date: date | None, sol: int | None) -> deque[MarsPhotoAPIImage]:
-    '''Returns images from Mars rovers using the Mars Photo API.'''
+    return [_create_EPIC_API_image(collection, image_type, item) for item in data]
+
+
+async def iter_EPIC_API_images(collection: EPICAPICollectionType, series: bool, image_type: EPICAPIImageType, image_date: date | None, start_date: date | None = None, end_date: date | None = None) -> AsyncIterator[EPICAPIImage]:
+    '''Yields images of Earth from NASA's EPIC API, for the latest day, a given day, or each day with images in an inclusive start_date/end_date range (if image_date isn't given), in timestamp order.
+    Days are fetched ahead concurrently (at most `EPIC_MAX_CONCURRENT_DAYS` at a time) while earlier days are yielded.'''
+    EPIC_collection = await get_EPIC_collection(collection)
+    if image_date is None and (start_date is not None or end_date is not None):
+        days = EPIC_collection.find_dates(start_date, end_date)
+    else:
+        days = [EPIC_collection.latest_date if image_date is None else image_date.isoformat()]
+    semaphore = asyncio.Semaphore(EPIC_MAX_CONCURRENT_DAYS)
+
+    async def _get_day(day: str | None) -> list[EPICAPIImage]:
+        async with semaphore:
+            return await _get_EPIC_API_day(EPIC_collection, collection, series, image_type, day)
+
+    tasks = [asyncio.create_task(_get_day(day)) for day in days]
+    try:
+        for task in tasks:
+            for image in await task:
+                yield image
+    finally:
+        # Cancel days that weren't yielded if the caller stopped early or a day failed
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def get_EPIC_API_images(collection: EPICAPICollectionType, series: bool, image_type: EPICAPIImageType, image_date: date | None, start_date: date | None = None, end_date: date | None = None) -> deque[EPICAPIImage]:
+    '''Returns images of Earth from NASA's EPIC API, for the latest day, a given day, or each day in a start_date/end_date range (if image_date isn't given).
+    The latest series comes from the collection's snapshot, and past days' series are cached permanently since they never change.'''
+    return deque([image async for image in iter_EPIC_API_images(collection, series, image_type, image_date, start_date, end_date)])
+
+
+@dataclass(frozen=True, kw_only=True)
+class MPAPIQuery:
+    '''A planned Mars Photo API photo query for one rover.
+        Attributes:
+            rover (MarsPhotoAPIRoverType): Rover to query.
+            camera (MarsPhotoAPICameraType | None): Camera to filter for upstream, if only one can match.
+    '''
+    rover: MarsPhotoAPIRoverType
+    camera: MarsPhotoAPICameraType | None = None
+
+
+def plan_MP_API_queries(rovers: set[MarsPhotoAPIRoverType], cameras: set[MarsPhotoAPICameraType] | None) -> list[MPAPIQuery]:
+    '''Plans one query per rover that can have photos from the requested cameras.
+    Rovers without any of the cameras are skipped, and a rover with exactly one of them has it filtered for upstream.'''
+    queries = []
+    rover_configs = MARS_PHOTO_API_DATA['rovers']
+    for rover in sorted(rovers):
+        if not cameras:
+            queries.append(MPAPIQuery(rover=rover))
+            continue
+        rover_cameras = cameras & rover_configs[rover]['camera_names']
+        if len(rover_cameras) == 1:
+            queries.append(MPAPIQuery(rover=rover, camera=next(iter(rover_cameras))))
+        elif rover_cameras:
+            queries.append(MPAPIQuery(rover=rover))
+    return queries
+
+
+async def iter_MP_API_images(rovers: set[MarsPhotoAPIRoverType], cameras: set[MarsPhotoAPICameraType] | None, earth_date: date | None, sol: int | None) -> AsyncIterator[MarsPhotoAPIImage]:
+    '''Yields images from Mars rovers using the Mars Photo API, a rover at a time.
+    Only rovers that can match the cameras are queried, all at once, and each rover's images are yielded as soon as it and the rovers before it arrive.'''
 
     # If earth_date and sol weren't provided, get latest photos
     endpoint = 'photos'
     if earth_date is None and sol is None:
         endpoint = 'latest_photos'
 
-    # Query data from rovers
-    params = {'earth_date': earth_date, 'sol': sol}
-    images = deque()
-    with CachedSession() as session:
-        for rover in rovers:
-            url = f'https://mars-photos.herokuapp.com/api/v1/rovers/{rover}/{endpoint}'
-            res = request_get_json_cached(url, session, params=params)
-            data = res[endpoint]
-
-            # Extract data from image items
-            for item in data:
-
-                # Skip item if there are cameras to filter for and item's camera is not in filter
-                item_camera = item['camera']
-                camera_short = item_camera['name']
-                if cameras and camera_short.lower() not in cameras:
-                    continue
-
-                # Create objects
-                camera_obj = MarsPhotoAPICamera(short=camera_short,
-                                                name=item_camera['full_name'])
-                image = MarsPhotoAPIImage(rover_name=item['rover']['name'],
-                                          camera=camera_obj,
-                                          image=item['img_src'],
-                                          earth_date=item['earth_date'],
-                                          sol=item['sol'])
-                images.append(image)
-
-    return images
-
-
-def get_mars_photo_API_metadata(rovers: set[MarsPhotoAPIRoverType], manifest: bool | None, earth_date: date | None, sol: int | None) -> deque[MarsPhotoAPIMetadata]:
-    '''Returns metadata from Mars rovers (optionally photo manifests) using the Mars Photo API.'''
-
-    # Return metadata on requested rovers
-    metadata_list = deque()
-    with CachedSession() as session:
+    async def _get_rover_images(query: MPAPIQuery) -> list[MarsPhotoAPIImage]:
+        if ROVER_SNAPSHOT.has_rover(query.rover):
+            return ROVER_SNAPSHOT.get_photos(query.rover, cameras, earth_date, sol)
+
+        url = f'https://mars-photos.herokuapp.com/api/v1/rovers/{query.rover}/{endpoint}'
+        params = {'earth_date': earth_date, 'sol': sol, 'camera': query.camera}
+        res = await request_get_json_cached(url, params=params)
+        data = res[endpoint]
+
+        # Extract data from image items
+        images = []
+        for item in data:
+
+            # Skip item if there are cameras to filter for and item's camera is not in filter
+            item_camera = item['camera']
+            camera_short = item_camera['name']
+            if cameras and camera_short.lower() not in cameras:
+                continue
+
+            # Create objects, sharing the camera and rover name objects
+            image = MarsPhotoAPIImage(rover_name=MARS_PHOTO_API_ROVERS[query.rover].name,
+                                      camera=MarsPhotoAPICamera.get(camera_short, item_camera['full_name']),
+                                      image=item['img_src'],
+                                      earth_date=item['earth_date'],
+                                      sol=item['sol'])
+            images.append(image)
+        return images
+
+    # Query all rovers at once
+    tasks = [asyncio.create_task(_get_rover_images(query))
+             for query in plan_MP_API_queries(rovers, cameras)]
+    try:
+        for task in tasks:
+            for image in await task:
+                yield image
+    finally:
+        # Cancel remaining queries if the caller stopped early or a query failed
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def get_MP_API_images(rovers: set[MarsPhotoAPIRoverType], cameras: set[MarsPhotoAPICameraType] | None, earth_date: date | None, sol: int | None) -> deque[MarsPhotoAPIImage]:
+    '''Returns images from Mars rovers using the Mars Photo API.
+    Only rovers that can match the cameras are queried, all at once.'''
+    return deque([image async for image in iter_MP_API_images(rovers, cameras, earth_date, sol)])
+
+
+async def _get_current_rover(rover: MarsPhotoAPIRoverType) -> MarsPhotoAPIRover:
+    '''Returns a new rover object with the rover's current values from the Mars Photo API.'''
+    url = f'https://mars-photos.herokuapp.com/api/v1/rovers/{rover}'
+    res = await request_get_json_cached(url, max_age=ROVER_STATUS_INTERVAL)
+    data = res['rover']
+    return MarsPhotoAPIRover(**MARS_PHOTO_API_DATA['rovers'][rover],
+                             current_sol=data['max_sol'],
+                             current_date=data['max_date'],
+                             total_photos=data['total_photos'])
+
+
+async def refresh_rover_status() -> None:
+    '''Builds a new rover status snapshot with the active rovers' current values and swaps it in.
+    Rovers that fail to refresh keep their previous status.'''
+    global _rover_status
+    active_rovers = [rover for rover, rover_obj in MARS_PHOTO_API_ROVERS.items()
+                     if rover_obj.active]
+    results = await asyncio.gather(*(_get_current_rover(rover) for rover in active_rovers),
+                                   return_exceptions=True)
+
+    rover_status = dict(_rover_status or MARS_PHOTO_API_ROVERS)
+    for rover, result in zip(active_rovers, results):
+        if isinstance(result, Exception):
+            print(f'Rover status refresh for "{rover}" failed: {result}')  # TODO: logging
+        else:
+            rover_status[rover] = result
+    # Readers either see the previous snapshot or this one, never a partial update
+    _rover_status = MappingProxyType(rover_status)
+
+
+async def get_rover_status() -> Mapping[str, MarsPhotoAPIRover]:
+    '''Returns the latest rover status snapshot, refreshing it on the request path only if the scheduler hasn't yet.'''
+    if _rover_status is None:
+        await single_flight('rover_status', refresh_rover_status)
+    return _rover_status
+
+
+def schedule_rover_status_refresh(scheduler: Scheduler) -> None:
+    '''Adds a job refreshing the rover status snapshot to a scheduler.'''
+    scheduler.add_job('refresh_rover_status', refresh_rover_status,
+                      ROVER_STATUS_INTERVAL)
+
+
+async def _get_snapshot_manifest(rover: MarsPhotoAPIRoverType) -> dict[str, Any]:
+    '''Returns a rover's manifest response from the snapshot.'''
+    return {'photo_manifest': ROVER_SNAPSHOT.get_photo_manifest(rover)}
+
+
+async def _get_manifest_index(rover: MarsPhotoAPIRoverType) -> ManifestIndex:
+    '''Returns a rover's manifest index, from the snapshot if it has the rover, otherwise from the Mars Photo API.'''
+    if ROVER_SNAPSHOT.has_rover(rover):
+        return await SNAPSHOT_MANIFEST_INDEXES.get(rover, partial(_get_snapshot_manifest, rover))
+    url = f'https://mars-photos.herokuapp.com/api/v1/manifests/{rover}'
+    return await MANIFEST_INDEXES.get(rover, partial(request_get_json_cached, url, max_age=MANIFEST_REFRESH_INTERVAL))
+
+
+async def iter_MP_API_metadata(rovers: set[MarsPhotoAPIRoverType], manifest: bool | None, earth_date: date | None, sol: int | None, sol_from: int | None = None, sol_to: int | None = None) -> AsyncIterator[MarsPhotoAPIMetadata]:
+    '''Yields metadata from Mars rovers (optionally photo manifests) using the Mars Photo API, a rover at a time.
+    Manifests of all rovers are fetched at once, and filtered by earth_date, sol, or an inclusive sol_from/sol_to range, in that order of precedence.'''
+
+    # Read the status of all requested rovers from one snapshot, in a stable order so responses (and their entity tags) are too
+    rover_status = await get_rover_status()
+    rovers = sorted(rovers)
+
+    # Fetch all rover manifests at once if requested
+    tasks = {rover: asyncio.create_task(_get_manifest_index(rover))
+             for rover in rovers} if manifest else {}
+    try:
         for rover in rovers:
             # Create metadata object
-            rover_obj = MARS_PHOTO_API_ROVERS[rover]
-            metadata = MarsPhotoAPIMetadata(rover=rover_obj)
+            metadata = MarsPhotoAPIMetadata(rover=rover_status[rover])
 
             # Add rover manifest to metadata if requested
             if manifest:
-                url = f'https://mars-photos.herokuapp.com/api/v1/manifests/{rover}'
-                res = request_get_json_cached(url, session)
-
-                # Filter for specific manifests if earth_date or sol provided
-                if earth_date:
-                    data = [item for item in res['photo_manifest']['photos']
-                            if item['earth_date'] == earth_date.isoformat()]
-                elif sol is not None:
-                    data = [item for item in res['photo_manifest']['photos']
-                            if item['sol'] == sol]
-                else:
-                    data = res['photo_manifest']['photos']
-
-                # Extract data from manifest items
-                camera_mappings = MARS_PHOTO_API_DATA['cameras']
-                manifests = deque()
-                for item in data:
-                    # Extract camera short and full name from manifest item
-                    manifest_cameras = [MarsPhotoAPICamera(short=camera_short, name=camera_mappings[camera_short])
-                                        for camera_short in item['cameras']]
-                    item['cameras'] = manifest_cameras
-                    manifest = MarsPhotoAPIMetadataManifest(**item)
-                    manifests.append(manifest)
-                metadata.manifests = manifests
-
-            # If rover is still active, update fields to reflect current values
-            if rover_obj.active:
-                url = f'https://mars-photos.herokuapp.com/api/v1/rovers/{rover}'
-                res = request_get_json_cached(url, session)
-                data = res['rover']
-                rover_obj.final_date = data['max_date']
-                rover_obj.final_sol = data['max_sol']
-                rover_obj.total_photos = data['total_photos']
-
-            metadata_list.append(metadata)
-
-    return metadata_list
+                index = await tasks[rover]
+                metadata.manifests = deque(index.find(earth_date=earth_date, sol=sol,
+                                                      sol_from=sol_from, sol_to=sol_to))
+
+            yield metadata
+    finally:
+        # Cancel remaining fetches if the caller stopped early or a fetch failed
+        for task in tasks.values():
+            task.cancel()
+        await asyncio.gather(*tasks.values(), return_exceptions=True)
+
+
+async def get_MP_API_metadata(rovers: set[MarsPhotoAPIRoverType], manifest: bool | None, earth_date: date | None, sol: int | None, sol_from: int | None = None, sol_to: int | None = None) -> deque[MarsPhotoAPIMetadata]:
+    '''Returns metadata from Mars rovers (optionally photo manifests) using the Mars Photo API.
+    Manifests are filtered by earth_date, sol, or an inclusive sol_from/sol_to range, in that order of precedence.'''
+    return deque([metadata async for metadata in iter_MP_API_metadata(rovers, manifest, earth_date, sol, sol_from, sol_to)])
@@ -0,0 +1,163 @@
+import os
+import sqlite3
+from typing import Iterable, Iterator
+
+from src.models import Article
+
+_ARTICLE_COLUMNS = ('title', 'content', 'author',
+                    'image', 'url', 'timestamp', 'category')
+
+
+class ArticleStore:
+    '''Persistent SQLite store of articles, upserted by URL and indexed by timestamp, category and author.
+    Also keeps the feed ingestion state: each feed's conditional request validators and the guids of items already seen.
+    The database file is `db_path`, or the `ARTICLE_DB_PATH` environment variable (default: "articles.sqlite"), opened on first use.'''
+
+    def __init__(self, db_path: str | None = None):
+        self.db_path = db_path
+        self._connection: sqlite3.Connection | None = None
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        '''Database connection, created along with the schema on first use.'''
+        if self._connection is None:
+            db_path = self.db_path or os.getenv(
+                'ARTICLE_DB_PATH', 'articles.sqlite')
+            self._connection = sqlite3.connect(
+                db_path, check_same_thread=False)
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            with self._connection:
+                self._connection.executescript('''
+                    CREATE TABLE IF NOT EXISTS articles (
+                        url TEXT PRIMARY KEY,
+                        source TEXT NOT NULL,
+                        title TEXT NOT NULL,
+                        content TEXT NOT NULL,
+                        author TEXT NOT NULL,
+                        image TEXT NOT NULL,
+                        timestamp REAL NOT NULL,
+                        category TEXT NOT NULL
+                    );
+                    CREATE INDEX IF NOT EXISTS articles_timestamp_idx ON articles(timestamp);
+                    CREATE INDEX IF NOT EXISTS articles_source_idx ON articles(source, timestamp, url);
+                    CREATE INDEX IF NOT EXISTS articles_category_idx ON articles(category, timestamp);
+                    CREATE INDEX IF NOT EXISTS articles_author_idx ON articles(author, timestamp);
+                    CREATE TABLE IF NOT EXISTS feeds (
+                        url TEXT PRIMARY KEY,
+                        etag TEXT,
+                        last_modified TEXT
+                    );
+                    CREATE TABLE IF NOT EXISTS seen_guids (
+                        guid TEXT PRIMARY KEY
+                    );
+                ''')
+        return self._connection
+
+    @staticmethod
+    def _upsert(con: sqlite3.Connection, source: str, articles: Iterable[Article]) -> None:
+        '''Adds or replaces (by URL) a source's articles, without committing.'''
+        rows = ((source, *(getattr(article, column) for column in _ARTICLE_COLUMNS))
+                for article in articles)
+        updates = ', '.join(f'{column} = excluded.{column}'
+                            for column in ('source', *_ARTICLE_COLUMNS) if column != 'url')
+        con.executemany(f'''
+            INSERT INTO articles (source, {', '.join(_ARTICLE_COLUMNS)})
+            VALUES (?, {', '.join('?' * len(_ARTICLE_COLUMNS))})
+            ON CONFLICT(url) DO UPDATE SET {updates}
+        ''', rows)
+
+    @staticmethod
+    def _mark_seen(con: sqlite3.Connection, guids: Iterable[str]) -> None:
+        '''Marks feed item guids as seen, without committing.'''
+        con.executemany('INSERT OR IGNORE INTO seen_guids (guid) VALUES (?)',
+                        ((guid,) for guid in guids))
+
+    @staticmethod
+    def _set_feed_validators(con: sqlite3.Connection, url: str, etag: str | None, last_modified: str | None) -> None:
+        '''Saves a feed's validators, without committing.'''
+        con.execute('INSERT OR REPLACE INTO feeds (url, etag, last_modified) VALUES (?, ?, ?)',
+                    (url, etag, last_modified))
+
+    def upsert(self, source: str, articles: Iterable[Article]) -> None:
+        '''Adds or replaces (by URL) a source's articles.'''
+        with self.connection as con:
+            self._upsert(con, source, articles)
+
+    def ingest(
+            self,
+            source: str,
+            articles: Iterable[Article],
+            seen_guids: Iterable[str] = (),
+            feed_validators: dict[str, tuple[str | None, str | None]] | None = None
+    ) -> None:
+        '''Adds or replaces a source's articles, marks feed item guids as seen and saves feeds' `ETag` and `Last-Modified` values (keyed by feed URL), all in one transaction.
+        Either everything is saved or nothing is, so items are never marked seen (or feeds unchanged) without their articles being stored.'''
+        with self.connection as con:
+            self._upsert(con, source, articles)
+            self._mark_seen(con, seen_guids)
+            for url, (etag, last_modified) in (feed_validators or {}).items():
+                self._set_feed_validators(con, url, etag, last_modified)
+
+    def latest_timestamp(self, source: str) -> float | None:
+        '''Returns the timestamp of a source's newest article, if any.'''
+        row = self.connection.execute(
+            'SELECT MAX(timestamp) FROM articles WHERE source = ?', (source,)).fetchone()
+        return row[0]
+
+    def iter_newest(
+            self,
+            source: str,
+            earliest_timestamp: float,
+            limit: int | None = None,
+            before: tuple[float, str] | None = None
+    ) -> Iterator[Article]:
+        '''Lazily yields a source's articles published at or after a timestamp, newest first (ties ordered by URL, descending).
+        If `before` is given, only articles ordered after that (timestamp, URL) key are yielded, to resume from a previous page.
+        Rows are read from a range scan on the (source, timestamp, url) index only as the iterator is consumed.'''
+        query = f'''
+            SELECT {', '.join(_ARTICLE_COLUMNS)} FROM articles
+            WHERE source = ? AND timestamp >= ?
+        '''
+        args: list = [source, earliest_timestamp]
+        if before is not None:
+            query += ' AND (timestamp, url) < (?, ?)'
+            args.extend(before)
+        query += ' ORDER BY timestamp DESC, url DESC LIMIT ?'
+        args.append(-1 if limit is None else limit)
+        cur = self.connection.execute(query, args)
+        return (Article(*row) for row in cur)
+
+    def get_feed_validators(self, url: str) -> tuple[str | None, str | None]:
+        '''Returns the `ETag` and `Last-Modified` values of a feed's latest response, if any.'''
+        row = self.connection.execute(
+            'SELECT etag, last_modified FROM feeds WHERE url = ?', (url,)).fetchone()
+        return row or (None, None)
+
+    def set_feed_validators(self, url: str, etag: str | None, last_modified: str | None) -> None:
+        '''Saves the `ETag` and `Last-Modified` values of a feed's latest response.'''
+        with self.connection as con:
+            self._set_feed_validators(con, url, etag, last_modified)
+
+    def is_seen(self, guid: str) -> bool:
+        '''Returns whether a feed item guid has been marked as seen.'''
+        row = self.connection.execute(
+            'SELECT 1 FROM seen_guids WHERE guid = ?', (guid,)).fetchone()
+        return row is not None
+
+    def mark_seen(self, guids: Iterable[str]) -> None:
+        '''Marks feed item guids as seen, so they are skipped in later requests.'''
+        with self.connection as con:
+            self._mark_seen(con, guids)
+
+    def clear(self) -> None:
+        '''Removes all articles, feed validators and seen guids.'''
+        with self.connection as con:
+            con.execute('DELETE FROM articles')
+            con.execute('DELETE FROM feeds')
+            con.execute('DELETE FROM seen_guids')
+
+    def close(self) -> None:
+        '''Closes the database connection, if open.'''
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
@@ -0,0 +1,165 @@
+import json
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from dataclasses import dataclass
+from datetime import date
+from hashlib import sha256
+from time import time
+from types import MappingProxyType
+from typing import Any
+from urllib.parse import urlencode
+
+from requests_cache import DO_NOT_CACHE, NEVER_EXPIRE
+from requests_cache.policy.expiration import ExpirationPatterns, ExpirationTime, get_expiration_datetime, get_url_expiration
+
+from src.cache_config import CacheConfig
+
+
+def normalize_params(params: dict[str, Any] | None) -> dict[str, Any]:
+    '''Drops unset query parameters and converts dates to ISO 8601 strings.'''
+    if not params:
+        return {}
+    return {k: v.isoformat() if isinstance(v, date) else v
+            for k, v in params.items() if v is not None}
+
+
+def create_key(url: str, params: dict[str, Any] | None = None) -> str:
+    '''Creates a cache key from a URL and its (normalized) query parameters.'''
+    params = normalize_params(params)
+    if not params:
+        return url
+    return f'{url}?{urlencode(sorted(params.items()))}'
+
+
+def freeze_json(data: Any) -> Any:
+    '''Returns json-decoded content as read-only views, with lists as tuples and objects as `MappingProxyType`s.'''
+    if isinstance(data, dict):
+        return MappingProxyType({k: freeze_json(v) for k, v in data.items()})
+    if isinstance(data, list):
+        return tuple(freeze_json(v) for v in data)
+    return data
+
+
+@dataclass(kw_only=True)
+class CacheStats:
+    '''Hit and miss counts of each cache level.
+        Attributes:
+            l1_hits (int): Lookups served from the in-process LRU.
+            l1_misses (int): Lookups not in (or expired in) the in-process LRU.
+            l2_hits (int): L1 misses served from the backend.
+            l2_misses (int): L1 misses not in (or expired in) the backend.
+    '''
+    l1_hits: int = 0
+    l1_misses: int = 0
+    l2_hits: int = 0
+    l2_misses: int = 0
+
+
+@dataclass(frozen=True, kw_only=True)
+class _CacheEntry:
+    '''A cached response's json-decoded content, with the times (POSIX timestamps) it was cached at and expires at, if ever.'''
+    created: float
+    expires: float | None
+    data: Any
+
+    def is_fresh(self, now: float, max_age: float | None) -> bool:
+        '''Returns whether the entry hasn't expired and, if `max_age` is given, was cached at most `max_age` seconds ago.'''
+        if self.expires is not None and self.expires <= now:
+            return False
+        return max_age is None or now - self.created <= max_age
+
+
+class UpstreamCache:
+    '''Two-level cache of json-decoded upstream responses keyed by URL and query parameters.
+    L1 is a bounded in-process LRU of decoded content. L2 is the backend, which stores compact JSON and, for SQLite or the filesystem, is shared by all worker processes.
+    Each response expires after the value of the first `urls_expire_after` pattern its key matches, or `expire_after` otherwise.
+    Cached content is shared by all callers, so it's handed out read-only (see `freeze_json`).'''
+
+    def __init__(
+            self,
+            backend: MutableMapping[str, bytes],
+            expire_after: ExpirationTime = NEVER_EXPIRE,
+            urls_expire_after: ExpirationPatterns | None = None,
+            l1_maxsize: int = 1024
+    ):
+        self.backend = backend
+        self.expire_after = expire_after
+        self.urls_expire_after = urls_expire_after or {}
+        self.l1_maxsize = l1_maxsize
+        self.stats = CacheStats()
+        self._l1: OrderedDict[str, _CacheEntry] = OrderedDict()
+
+    @staticmethod
+    def _storage_key(key: str) -> str:
+        '''Hashes a key so it's safe to use with any backend, e.g. as a file name.'''
+        return sha256(key.encode()).hexdigest()
+
+    def _set_l1(self, key: str, entry: _CacheEntry) -> None:
+        '''Caches an entry in L1, evicting the least recently used ones past `l1_maxsize`.'''
+        self._l1[key] = entry
+        self._l1.move_to_end(key)
+        while len(self._l1) > self.l1_maxsize:
+            self._l1.popitem(last=False)
+
+    def get(self, key: str, max_age: float | None = None) -> Any:
+        '''Returns the cached content for a key, or `None` if there isn't any, it expired, or it was cached more than `max_age` seconds ago.'''
+        now = time()
+        entry = self._l1.get(key)
+        if entry is not None and entry.is_fresh(now, max_age):
+            self._l1.move_to_end(key)
+            self.stats.l1_hits += 1
+            return entry.data
+        self.stats.l1_misses += 1
+
+        # Another worker may have cached a newer response
+        storage_key = self._storage_key(key)
+        try:
+            value = self.backend[storage_key]
+        except KeyError:
+            value = None
+        if value is not None:
+            created, expires, data = json.loads(value)
+            data = freeze_json(data)
+            entry = _CacheEntry(created=created, expires=expires, data=data)
+            if entry.is_fresh(now, max_age):
+                self._set_l1(key, entry)
+                self.stats.l2_hits += 1
+                return data
+            if expires is not None and expires <= now:
+                self._l1.pop(key, None)
+                self.backend.pop(storage_key, None)
+        self.stats.l2_misses += 1
+        return None
+
+    def set(self, key: str, data: Any) -> Any:
+        '''Caches json-encodable content for a key in both levels, unless its expiration rule is to not cache it.
+        Returns the content as it's handed out by `get`.'''
+        frozen = freeze_json(data)
+        expire_after = get_url_expiration(key, self.urls_expire_after)
+        if expire_after is None:
+            expire_after = self.expire_after
+        if expire_after == DO_NOT_CACHE:
+            return frozen
+        expires = get_expiration_datetime(expire_after)
+        entry = _CacheEntry(created=time(),
+                            expires=expires.timestamp() if expires is not None else None,
+                            data=frozen)
+        self._set_l1(key, entry)
+        self.backend[self._storage_key(key)] = json.dumps(
+            [entry.created, entry.expires, data], separators=(',', ':')).encode()
+        return frozen
+
+
+_cache: UpstreamCache | None = None
+
+
+def get_upstream_cache() -> UpstreamCache:
+    '''Returns the process-wide upstream cache, creating it from the environment on first use.'''
+    global _cache
+    if _cache is None:
+        config = CacheConfig.from_env()
+        _cache = UpstreamCache(config.create_backend(),
+                               expire_after=config.expire_after,
+                               urls_expire_after=config.urls_expire_after,
+                               l1_maxsize=config.l1_maxsize)
+    return _cache
@@ -0,0 +1,119 @@
+from collections import OrderedDict
+from collections.abc import Iterator, MutableMapping
+from dataclasses import dataclass, field
+from datetime import timedelta
+from enum import StrEnum, auto
+import os
+from typing import Self
+
+from requests_cache import NEVER_EXPIRE
+from requests_cache.backends.filesystem import FileDict
+from requests_cache.backends.sqlite import SQLiteDict
+from requests_cache.policy.expiration import ExpirationPatterns, ExpirationTime
+from requests_cache.serializers.pipeline import SerializerPipeline
+
+from src.models import MarsPhotoAPIRoverType
+
+
+# Stores values as is, in binary files
+_BYTES_SERIALIZER = SerializerPipeline([], name='bytes', is_binary=True)
+
+
+class _LRUDict(MutableMapping[str, bytes]):
+    '''In-memory storage backend that evicts the least recently used values past `maxsize`, so unread expired ones don't pile up.'''
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data: OrderedDict[str, bytes] = OrderedDict()
+
+    def __getitem__(self, key: str) -> bytes:
+        value = self._data[key]
+        self._data.move_to_end(key)
+        return value
+
+    def __setitem__(self, key: str, value: bytes) -> None:
+        self._data[key] = value
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def __delitem__(self, key: str) -> None:
+        del self._data[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._data)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class CacheBackendType(StrEnum):
+    '''Enum for upstream cache storage backend type.'''
+    MEMORY: str = auto()
+    SQLITE: str = auto()
+    FILESYSTEM: str = auto()
+
+
+def _create_urls_expire_after() -> ExpirationPatterns:
+    '''Creates the per-URL expiration rules of upstream responses, checked in order (first match wins).'''
+    urls_expire_after: ExpirationPatterns = {}
+    # Inactive rovers' photos and manifests never change
+    for rover in sorted(MarsPhotoAPIRoverType.get_inactive_rovers()):
+        urls_expire_after[f'mars-photos.herokuapp.com/api/v1/rovers/{rover}'] = NEVER_EXPIRE
+        urls_expire_after[f'mars-photos.herokuapp.com/api/v1/manifests/{rover}'] = NEVER_EXPIRE
+    urls_expire_after.update({
+        # New articles are published every few minutes
+        'api.spaceflightnewsapi.net': timedelta(minutes=5),
+        # Archived days keep their images, latest images and available dates change a few times a day
+        'epic.gsfc.nasa.gov/api/*/date/': timedelta(days=30),
+        'epic.gsfc.nasa.gov': timedelta(minutes=30),
+        # Active rovers send new photos about once a day
+        'mars-photos.herokuapp.com': timedelta(hours=6),
+    })
+    return urls_expire_after
+
+
+URLS_EXPIRE_AFTER = _create_urls_expire_after()
+
+
+@dataclass(frozen=True, kw_only=True)
+class CacheConfig:
+    '''Configuration for the upstream cache.
+        Attributes:
+            backend (CacheBackendType): Storage backend: in-memory (per process), SQLite in WAL mode or one file per response (both shared by worker processes).
+            cache_name (str): SQLite database file name (without extension) or filesystem cache directory.
+            expire_after (ExpirationTime): Seconds (or other requests-cache expiration value) responses not matching `urls_expire_after` are cached for.
+            urls_expire_after (ExpirationPatterns): Expiration values per URL glob pattern, checked in order.
+            l1_maxsize (int): Maximum number of decoded responses kept in each process, in front of the backend.
+            memory_maxsize (int): Maximum number of responses kept by the in-memory backend.
+    '''
+    backend: CacheBackendType = CacheBackendType.SQLITE
+    cache_name: str = 'http_cache'
+    expire_after: ExpirationTime = timedelta(hours=1)
+    urls_expire_after: ExpirationPatterns = field(
+        default_factory=lambda: dict(URLS_EXPIRE_AFTER))
+    l1_maxsize: int = 1024
+    memory_maxsize: int = 8192
+
+    @classmethod
+    def from_env(cls) -> Self:
+        '''Creates a config from `CACHE_*` environment variables, using defaults for unset ones.'''
+        env = {
+            'backend': ('CACHE_BACKEND', CacheBackendType),
+            'cache_name': ('CACHE_NAME', str),
+            'expire_after': ('CACHE_EXPIRE_AFTER', int),
+            'l1_maxsize': ('CACHE_L1_MAXSIZE', int),
+            'memory_maxsize': ('CACHE_MEMORY_MAXSIZE', int),
+        }
+        kwargs = {field: cast(os.environ[var])
+                  for field, (var, cast) in env.items() if os.getenv(var)}
+        return cls(**kwargs)
+
+    def create_backend(self) -> MutableMapping[str, bytes]:
+        '''Creates a storage backend of serialized responses keyed by cache key.'''
+        if self.backend == CacheBackendType.MEMORY:
+            return _LRUDict(self.memory_maxsize)
+        if self.backend == CacheBackendType.FILESYSTEM:
+            return FileDict(self.cache_name, serializer=_BYTES_SERIALIZER, extension='json')
+        return SQLiteDict(f'{self.cache_name}.sqlite', table_name='json_cache',
+                          serializer=None, wal=True)
@@ -0,0 +1,108 @@
+import asyncio
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+import os
+from typing import Any, Self
+
+import httpx
+
+
+@dataclass(frozen=True, kw_only=True)
+class HTTPClientConfig:
+    '''Configuration for the shared upstream HTTP client pool.
+        Attributes:
+            timeout (float): Seconds to wait for reading, writing and acquiring a pooled connection.
+            connect_timeout (float): Seconds to wait for establishing a connection.
+            max_connections (int): Maximum number of open connections across all hosts.
+            max_connections_per_host (int): Maximum number of concurrent requests to a single host.
+            max_keepalive_connections (int): Maximum number of idle connections kept alive for reuse.
+            keepalive_expiry (float): Seconds an idle connection is kept alive for.
+    '''
+    timeout: float = 10
+    connect_timeout: float = 5
+    max_connections: int = 100
+    max_connections_per_host: int = 10
+    max_keepalive_connections: int = 20
+    keepalive_expiry: float = 30
+
+    @classmethod
+    def from_env(cls) -> Self:
+        '''Creates a config from `HTTP_*` environment variables, using defaults for unset ones.'''
+        env = {
+            'timeout': ('HTTP_TIMEOUT', float),
+            'connect_timeout': ('HTTP_CONNECT_TIMEOUT', float),
+            'max_connections': ('HTTP_MAX_CONNECTIONS', int),
+            'max_connections_per_host': ('HTTP_MAX_CONNECTIONS_PER_HOST', int),
+            'max_keepalive_connections': ('HTTP_MAX_KEEPALIVE_CONNECTIONS', int),
+            'keepalive_expiry': ('HTTP_KEEPALIVE_EXPIRY', float),
+        }
+        kwargs = {field: cast(os.environ[var])
+                  for field, (var, cast) in env.items() if os.getenv(var)}
+        return cls(**kwargs)
+
+
+class HTTPClientPool:
+    '''Shared async HTTP client with keep-alive connections and a bounded number of concurrent requests per host.'''
+
+    def __init__(self, config: HTTPClientConfig | None = None):
+        self.config = config or HTTPClientConfig()
+        self.client = httpx.AsyncClient(
+            timeout=httpx.Timeout(self.config.timeout,
+                                  connect=self.config.connect_timeout),
+            limits=httpx.Limits(max_connections=self.config.max_connections,
+                                max_keepalive_connections=self.config.max_keepalive_connections,
+                                keepalive_expiry=self.config.keepalive_expiry),
+            follow_redirects=True)
+        self._host_limits: defaultdict[str, asyncio.Semaphore] = defaultdict(
+            lambda: asyncio.Semaphore(self.config.max_connections_per_host))
+
+    async def get(self,
+                  url: str,
+                  params: dict[str, Any] | None = None,
+                  *,
+                  headers: dict[str, Any] | None = None,
+                  timeout: float | None = None) -> httpx.Response:
+        '''Sends a GET request through the pool, waiting for a free slot for the URL's host.
+        Query parameters are merged into any query string already in the URL (e.g. pagination links).'''
+        request_url = httpx.URL(url)
+        if params:
+            request_url = request_url.copy_merge_params(params)
+        kwargs = {} if timeout is None else {'timeout': timeout}
+        async with self._host_limits[request_url.host]:
+            return await self.client.get(request_url, headers=headers, **kwargs)
+
+    async def aclose(self) -> None:
+        '''Closes all pooled connections.'''
+        await self.client.aclose()
+
+
+_pool: HTTPClientPool | None = None
+
+
+def get_http_client_pool() -> HTTPClientPool:
+    '''Returns the shared client pool, creating one from the environment if the app lifespan hasn't.'''
+    global _pool
+    if _pool is None:
+        _pool = HTTPClientPool(HTTPClientConfig.from_env())
+    return _pool
+
+
+async def close_http_client_pool() -> None:
+    '''Closes and discards the shared client pool, if any.'''
+    global _pool
+    if _pool is not None:
+        pool, _pool = _pool, None
+        await pool.aclose()
+
+
+@asynccontextmanager
+async def http_client_lifespan(config: HTTPClientConfig | None = None):
+    '''Opens the shared client pool for the duration of the context, e.g. the app's lifespan.'''
+    global _pool
+    await close_http_client_pool()
+    _pool = HTTPClientPool(config or HTTPClientConfig.from_env())
+    try:
+        yield _pool
+    finally:
+        await close_http_client_pool()
@@ -1,75 +1,127 @@
+import asyncio
 from datetime import datetime, UTC, timedelta
+from functools import partial
+from time import perf_counter
 from pydantic import AwareDatetime
-import requests
-from requests_cache import CachedSession
-from typing import Any, Callable
+import httpx
+from typing import Any, Awaitable, Callable, TypeVar
+
+from src.cache import create_key, freeze_json, get_upstream_cache, normalize_params
+from src.client import get_http_client_pool
+
+T = TypeVar('T')
 
 REQUEST_HEADERS: dict[str, str] = {
     'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36'}
 
 
-def noop(*args, **kwargs) -> None:
-    pass
+# Key -> task of the in-flight call shared by concurrent `single_flight` callers
+_inflight_calls: dict[str, asyncio.Task] = {}
+
+
+async def single_flight(key: str, fn: Callable[[], Awaitable[T]]) -> T:
+    '''Awaits `fn()`, sharing one in-flight call and its result (or error) among concurrent callers with the same key.'''
+    task = _inflight_calls.get(key)
+    if task is None:
+        task = asyncio.create_task(fn())
+        _inflight_calls[key] = task
+
+        def _done(task: asyncio.Task) -> None:
+            if _inflight_calls.get(key) is task:
+                del _inflight_calls[key]
+            # Retrieve the error so it isn't reported as unhandled if every caller was cancelled
+            if not task.cancelled():
+                task.exception()
+        task.add_done_callback(_done)
 
+    # Shield so a cancelled caller doesn't cancel the call other callers share
+    return await asyncio.shield(task)
 
-def request_get_json(
+
+async def request_get_json_cached(
         url: str,
-        params: dict[str, Any] | None = None,
         *,
-        exception_handler: Callable[[requests.RequestException], Any] = noop,
+        params: dict[str, Any] | None = None,
+        exception_handler: Callable[[
+            httpx.HTTPError], Any] | None = None,
         headers: dict[str, Any] | None = None,
-        timeout: int = 10
+        timeout: float | None = None,
+        max_age: float | None = None,
+        cache: bool = True
 ) -> Any:
-    """Handles a GET request and returns the json-encoded content of a response, if any.
+    '''Handles a GET request and returns the json-encoded content of a response, if any, as read-only tuples and mappings.
+    The content is served from the upstream cache if present, otherwise it's requested through the shared client pool and cached.
+    Concurrent calls for the same URL and params share one upstream request.
         Args:
-            url (str): URL for the new `Request` object.
-            params (dict[str, Any]): Optional. A list of tuples or bytes to send in the query string for the `Request`.
-            exception_fn (Callable[[RequestException], Any]): Optional. A function that takes in the `RequestException` and returns json-encoded content, if any.
+            url (str): URL for the request.
+            params (dict[str, Any]): Optional. A dictionary to send in the query string for the request. Unset (`None`) values are dropped.
+            exception_handler (Callable[[HTTPError], Any]): Optional. A function that takes in the `HTTPError` and returns json-encoded content, if any. The error is raised if not given.
             headers (dict[str, Any]): Optional. A dictionary of HTTP headers to send to the specified url.
-            timeout (int): Optional. A number indicating how many seconds to wait for the client to make a connection and/or send a response.
-    """
-    data = None
+            timeout (float): Optional. A number indicating how many seconds to wait for the client to make a connection and/or send a response. Defaults to the pool's timeout.
+            max_age (float): Optional. Only serves cached content requested at most this many seconds ago (by any worker sharing the cache), otherwise requests and caches it again. `0` always requests it.
+            cache (bool): Optional. Whether to cache the response, e.g. not for content that may still be incomplete. Defaults to `True`.
+    '''
+    key = create_key(url, params)
+    if max_age != 0:
+        data = get_upstream_cache().get(key, max_age)
+        if data is not None:
+            return data
+
     try:
-        res = requests.get(url, params, headers=headers, timeout=timeout)
-        res.raise_for_status()
-        data = res.json()
-    except requests.exceptions.RequestException as e:
-        data = exception_handler(e)
-    return data
+        # Calls that don't cache their response don't share one with calls that do
+        return await single_flight(key if cache else f'{key} (uncached)',
+                                   partial(_fetch_json_cached, key, url, params, headers, timeout, cache))
+    except httpx.HTTPError as e:
+        if exception_handler is None:
+            raise
+        return exception_handler(e)
+
+
+async def _fetch_json_cached(key: str, url: str, params: dict[str, Any] | None, headers: dict[str, Any] | None, timeout: float | None, cache: bool = True) -> Any:
+    '''Requests json-encoded content through the shared client pool and, if `cache` is set, caches it under `key`.'''
+    res = await get_http_client_pool().get(url, normalize_params(params), headers=headers, timeout=timeout)
+    res.raise_for_status()
+    if not cache:
+        return freeze_json(res.json())
+    return get_upstream_cache().set(key, res.json())
 
 
-def request_get_json_cached(
+async def request_get_conditional(
         url: str,
-        session: CachedSession,
         *,
-        params: dict[str, Any] | None = None,
-        exception_handler: Callable[[
-            requests.RequestException], Any] | None = None,
+        etag: str | None = None,
+        last_modified: str | None = None,
         headers: dict[str, Any] | None = None,
-        timeout: int = 10
-) -> Any:
-    '''Handles a GET request and returns the json-encoded content of a response, if any.
+        timeout: float | None = None
+) -> httpx.Response | None:
+    '''Handles a conditional GET request through the shared client pool and returns the response, or `None` if the resource hasn't changed (304).
         Args:
-            url (str): URL for the new `Request` object.
-            session (CachedSession): a cached version of a `Session` object for making requests.
-            params (dict[str, Any]): Optional. A list of tuples or bytes to send in the query string for the `Request`.
-            exception_handler (Callable[[RequestException], Any]): Optional. A function that takes in the `RequestException` and returns json-encoded content, if any.
+            url (str): URL for the request.
+            etag (str): Optional. `ETag` of the previous response, sent as `If-None-Match`.
+            last_modified (str): Optional. `Last-Modified` of the previous response, sent as `If-Modified-Since`.
             headers (dict[str, Any]): Optional. A dictionary of HTTP headers to send to the specified url.
-            timeout (int): Optional. A number indicating how many seconds to wait for the client to make a connection and/or send a response.
+            timeout (float): Optional. A number indicating how many seconds to wait for the client to make a connection and/or send a response. Defaults to the pool's timeout.
     '''
-    data = None
-    if exception_handler is not None:
-        try:
-            res = session.get(url, params, headers=headers, timeout=timeout)
-            res.raise_for_status()
-            data = res.json()
-        except requests.exceptions.RequestException as e:
-            data = exception_handler(e)
-    else:
-        res = session.get(url, params, headers=headers, timeout=timeout)
-        res.raise_for_status()
-        data = res.json()
-    return data
+    headers = dict(headers or {})
+    if etag:
+        headers['If-None-Match'] = etag
+    if last_modified:
+        headers['If-Modified-Since'] = last_modified
+    res = await get_http_client_pool().get(url, headers=headers, timeout=timeout)
+    if res.status_code == httpx.codes.NOT_MODIFIED:
+        return None
+    res.raise_for_status()
+    return res
+
+
+async def timed(name: str, aw: Awaitable[T], timings: dict[str, float] | None = None) -> T:
+    '''Awaits an awaitable and, if `timings` is given, records how many seconds it took under `name`.'''
+    start = perf_counter()
+    try:
+        return await aw
+    finally:
+        if timings is not None:
+            timings[name] = perf_counter() - start
 
 
 def datetime_UTC(dt: datetime) -> AwareDatetime:
@@ -0,0 +1,100 @@
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, field
+from datetime import date
+from functools import partial
+from time import monotonic
+from typing import Any, Awaitable, Callable, Self
+
+from src.helpers import single_flight
+from src.models import MarsPhotoAPICamera, MarsPhotoAPIMetadataManifest
+
+
+@dataclass(frozen=True, kw_only=True)
+class ManifestIndex:
+    '''A rover's photo manifests indexed by sol and by earth date.
+        Attributes:
+            manifests (list[MarsPhotoAPIMetadataManifest]): Manifests sorted by sol.
+            sols (list[int]): Sols of `manifests`, in the same order, for range queries.
+            by_sol (dict[int, MarsPhotoAPIMetadataManifest]): Manifests keyed by sol.
+            by_earth_date (dict[str, list[MarsPhotoAPIMetadataManifest]]): Manifests keyed by ISO 8601 earth date.
+            created (float): Monotonic time the index was built at.
+    '''
+    manifests: list[MarsPhotoAPIMetadataManifest]
+    sols: list[int]
+    by_sol: dict[int, MarsPhotoAPIMetadataManifest]
+    by_earth_date: dict[str, list[MarsPhotoAPIMetadataManifest]]
+    created: float = field(default_factory=monotonic)
+
+    @classmethod
+    def from_photo_manifest(cls, photo_manifest: dict[str, Any]) -> Self:
+        '''Builds an index from the `photo_manifest` of a Mars Photo API manifest response.'''
+        # Cameras are shared across all sols
+        manifests = [MarsPhotoAPIMetadataManifest(sol=item['sol'],
+                                                  earth_date=item['earth_date'],
+                                                  total_photos=item['total_photos'],
+                                                  cameras=[MarsPhotoAPICamera.get(camera_short)
+                                                           for camera_short in item['cameras']])
+                     for item in sorted(photo_manifest['photos'], key=lambda item: item['sol'])]
+
+        by_earth_date = {}
+        for manifest in manifests:
+            by_earth_date.setdefault(manifest.earth_date, []).append(manifest)
+        return cls(manifests=manifests,
+                   sols=[manifest.sol for manifest in manifests],
+                   by_sol={manifest.sol: manifest for manifest in manifests},
+                   by_earth_date=by_earth_date)
+
+    def find(
+            self,
+            *,
+            earth_date: date | None = None,
+            sol: int | None = None,
+            sol_from: int | None = None,
+            sol_to: int | None = None
+    ) -> list[MarsPhotoAPIMetadataManifest]:
+        '''Returns the manifests for an earth date, a sol, or an inclusive range of sols (in that order of precedence), or all of them.'''
+        if earth_date is not None:
+            return self.by_earth_date.get(earth_date.isoformat(), [])
+        if sol is not None:
+            manifest = self.by_sol.get(sol)
+            return [manifest] if manifest is not None else []
+        if sol_from is not None or sol_to is not None:
+            start = 0 if sol_from is None else bisect_left(self.sols, sol_from)
+            end = len(self.sols) if sol_to is None else bisect_right(
+                self.sols, sol_to)
+            return self.manifests[start:end]
+        return self.manifests
+
+
+class ManifestIndexCache:
+    '''Per-rover manifest indexes, rebuilt on use once they're older than `refresh_interval` seconds.
+    If a rebuild fails, the previous index is served until the next attempt.'''
+
+    def __init__(self, refresh_interval: float):
+        self.refresh_interval = refresh_interval
+        self._indexes: dict[str, ManifestIndex] = {}
+
+    async def get(self, rover: str, fetch: Callable[[], Awaitable[dict[str, Any]]]) -> ManifestIndex:
+        '''Returns a rover's manifest index, building it from the manifest response returned by `fetch` if missing or expired.'''
+        index = self._indexes.get(rover)
+        if index is not None and monotonic() - index.created < self.refresh_interval:
+            return index
+
+        try:
+            return await single_flight(f'manifest_index:{rover}', partial(self._build, rover, fetch))
+        except Exception as e:
+            if index is None:
+                raise
+            print(f'Manifest refresh for "{rover}" failed: {e}')  # TODO: logging
+            return index
+
+    async def _build(self, rover: str, fetch: Callable[[], Awaitable[dict[str, Any]]]) -> ManifestIndex:
+        '''Fetches a rover's manifest and replaces its index.'''
+        res = await fetch()
+        index = ManifestIndex.from_photo_manifest(res['photo_manifest'])
+        self._indexes[rover] = index
+        return index
+
+    def clear(self) -> None:
+        '''Removes all indexes.'''
+        self._indexes.clear()
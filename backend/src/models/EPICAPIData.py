@@ -2,14 +2,14 @@ from dataclasses import dataclass
 from enum import StrEnum, auto
 
 
-@dataclass(kw_only=True)
+@dataclass(frozen=True, slots=True, kw_only=True)
 class EPICAPIGeoCoordinate:
     '''Class for centroid coordinates.'''
     lat: float
     lon: float
 
 
-@dataclass(kw_only=True)
+@dataclass(frozen=True, slots=True, kw_only=True)
 class EPICAPI3DCoordinate:
     '''Class for j2000 object positions.'''
     x: float
@@ -17,7 +17,7 @@ class EPICAPI3DCoordinate:
     z: float
 
 
-@dataclass(kw_only=True)
+@dataclass(frozen=True, slots=True, kw_only=True)
 class EPICAPIQuaternions:
     '''Class for object attitude quaternions.'''
     q0: float
@@ -41,7 +41,7 @@ class EPICAPIImageType(StrEnum):
     THUMBS: str = auto()
 
 
-@dataclass(kw_only=True)
+@dataclass(frozen=True, slots=True, kw_only=True)
 class EPICAPIImage:
     '''Dataclass for extracted image metadata from the EPIC API.'''
     image: str
@@ -1,7 +1,6 @@
 from collections import deque
 from dataclasses import InitVar, dataclass, field
 from enum import StrEnum, auto
-from functools import cached_property
 from typing import Self
 
 MARS_PHOTO_API_DATA = {
@@ -184,14 +183,31 @@ class MarsPhotoAPICameraType(StrEnum):
     LCAM: str = auto()
 
 
-@dataclass(kw_only=True)
+@dataclass(frozen=True, slots=True, kw_only=True)
 class MarsPhotoAPICamera:
-    '''Dataclass for Mars rover camera names.'''
+    '''Dataclass for Mars rover camera names.
+    Use `MarsPhotoAPICamera.get` to share one instance per camera.'''
     short: str
     name: str
 
+    @classmethod
+    def get(cls, short: str, name: str | None = None) -> Self:
+        '''Returns the shared camera for a short name.
+        Cameras missing from `MARS_PHOTO_API_DATA` are created on first use, named `name` (or their short name).'''
+        camera = _MARS_PHOTO_API_CAMERAS.get(short)
+        if camera is None:
+            camera = _MARS_PHOTO_API_CAMERAS[short] = cls(short=short,
+                                                          name=name or short)
+        return camera
+
+
+# Camera short name -> shared camera
+_MARS_PHOTO_API_CAMERAS: dict[str, MarsPhotoAPICamera] = {
+    short: MarsPhotoAPICamera(short=short, name=name)
+    for short, name in MARS_PHOTO_API_DATA['cameras'].items()}
+
 
-@dataclass(kw_only=True)
+@dataclass(frozen=True, slots=True, kw_only=True)
 class MarsPhotoAPIRover:
     '''Dataclass for Mars rover metadata.'''
     name: str
@@ -205,13 +221,11 @@ class MarsPhotoAPIRover:
     total_photos: int | None = None
 
     def __post_init__(self, camera_names):
-        # Grabs camera_names and creates a MarsPhotoAPICamera list
-        camera_mappings = MARS_PHOTO_API_DATA['cameras']
-        self.cameras = [MarsPhotoAPICamera(
-            short=short.upper(),
-            name=camera_mappings[short.upper()]) for short in camera_names]
+        # Grabs camera_names and creates a list of the shared cameras, sorted so it's encoded the same in every process
+        object.__setattr__(self, 'cameras', [MarsPhotoAPICamera.get(short)
+                                             for short in sorted(short.upper() for short in camera_names)])
 
-    @cached_property
+    @property
     def camera_shorts(self):
         '''A set of a rover's camera short names.'''
         return {camera.short for camera in self.cameras}
@@ -222,7 +236,7 @@ for name, data in MARS_PHOTO_API_DATA['rovers'].items():
     MARS_PHOTO_API_ROVERS[name] = MarsPhotoAPIRover(**data)
 
 
-@dataclass(kw_only=True)
+@dataclass(frozen=True, slots=True, kw_only=True)
 class MarsPhotoAPIMetadataManifest:
     '''Dataclass for extracted Mars rover manifest data from the Mars Photo API.'''
     sol: int
@@ -231,14 +245,14 @@ class MarsPhotoAPIMetadataManifest:
     cameras: list[MarsPhotoAPICamera]
 
 
-@dataclass(kw_only=True)
+@dataclass(slots=True, kw_only=True)
 class MarsPhotoAPIMetadata:
     '''Dataclass for extracted Mars rover metadata from the Mars Photo API.'''
     rover: MarsPhotoAPIRover
     manifests: deque[MarsPhotoAPIMetadataManifest] | None = None
 
 
-@dataclass(kw_only=True)
+@dataclass(frozen=True, slots=True, kw_only=True)
 class MarsPhotoAPIImage:
     '''Dataclass for extracted image metadata from the Mars Photo API.'''
     rover_name: str
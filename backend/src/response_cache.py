@@ -0,0 +1,159 @@
+import asyncio
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from hashlib import blake2b
+import json
+from time import monotonic
+from typing import Any, Awaitable, Callable, Self
+
+from fastapi import Response, status
+import orjson
+
+from src.helpers import datetime_UTC
+
+
+@dataclass(frozen=True, kw_only=True)
+class CachePolicy:
+    '''How long a route's responses are cached.
+        Attributes:
+            ttl (float): Seconds a response is fresh and served as is.
+            stale_ttl (float): Seconds after `ttl` a response is still served while it's refreshed in the background.
+    '''
+    ttl: float
+    stale_ttl: float = 0
+
+
+def _encode_default(obj: Any) -> Any:
+    '''Converts the containers orjson doesn't serialize natively.'''
+    if isinstance(obj, (deque, set, frozenset)):
+        return list(obj)
+    raise TypeError(f'Type is not JSON serializable: {type(obj).__name__}')
+
+
+def encode_json(content: Any) -> bytes:
+    '''Serializes a route's content (the dataclasses in `src.models`, enums, dates, and containers of them) straight to JSON bytes.
+    The content is trusted, so it isn't validated against the route's return type, which only documents it in the OpenAPI schema.'''
+    return orjson.dumps(content, default=_encode_default)
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    '''Returns whether an `If-None-Match` header value matches an entity tag, using weak comparison (as the header requires).'''
+    if if_none_match.strip() == '*':
+        return True
+    return any(tag.strip().removeprefix('W/') == etag.removeprefix('W/')
+               for tag in if_none_match.split(','))
+
+
+@dataclass(kw_only=True)
+class CachedResponse:
+    '''A route's json-encoded response body and headers.
+    The body's entity tag (a hash of it) is computed once, so conditional requests are answered without encoding the content again.
+    It's weak, since the same tag is sent whether or not the body is compressed on the way out.'''
+    body: bytes
+    headers: dict[str, str] = field(default_factory=dict)
+    created: float = field(default_factory=monotonic)
+    etag: str = field(init=False)
+
+    def __post_init__(self):
+        self.etag = f'W/"{blake2b(self.body, digest_size=16).hexdigest()}"'
+
+    @classmethod
+    def encode(cls, content: Any, headers: dict[str, str] | None = None) -> Self:
+        '''Encodes a route's content (e.g. a list of dataclasses) to JSON.'''
+        return cls(body=encode_json(content), headers=headers or {})
+
+    def to_response(self, cache_status: str, max_age: float, if_none_match: str | None = None) -> Response:
+        '''Creates a JSON response, with an `X-Cache` header telling how it was served, and `ETag` and `Cache-Control` headers letting clients cache it for `max_age` seconds.
+        If `if_none_match` matches the entity tag, the response is a bodyless 304 (Not Modified) instead.'''
+        headers = {**self.headers,
+                   'ETag': self.etag,
+                   'Cache-Control': f'public, max-age={max(0, int(max_age))}',
+                   'X-Cache': cache_status}
+        if if_none_match is not None and etag_matches(if_none_match, self.etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return Response(content=self.body,
+                        media_type='application/json',
+                        headers=headers)
+
+
+def _normalize(value: Any) -> Any:
+    '''Converts query parameter values that aren't JSON-encodable into a canonical form.'''
+    if isinstance(value, (set, frozenset)):
+        return sorted(value)
+    if isinstance(value, datetime):
+        return datetime_UTC(value).isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f'Cannot normalize {type(value).__name__}')
+
+
+def create_route_key(route: str, **params: Any) -> str:
+    '''Creates a cache key from a route and its parsed query parameters, so equivalent queries share a key.'''
+    return f'{route}?{json.dumps(params, sort_keys=True, default=_normalize)}'
+
+
+class ResponseCache:
+    '''Bounded LRU cache of encoded route responses with stale-while-revalidate.
+    Concurrent requests for a missing or stale key share one computation.'''
+
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self._entries: OrderedDict[str, CachedResponse] = OrderedDict()
+        self._inflight: dict[str, asyncio.Task[CachedResponse]] = {}
+
+    def _compute(self, key: str, compute: Callable[[], Awaitable[CachedResponse]], refresh: bool = False) -> asyncio.Task[CachedResponse]:
+        '''Starts computing a key's response, unless it's already being computed.
+        If `refresh` is set, nobody awaits a new computation, so its failure is reported (once) instead.'''
+        task = self._inflight.get(key)
+        if task is None:
+            async def _run() -> CachedResponse:
+                try:
+                    entry = await compute()
+                    self._set(key, entry)
+                    return entry
+                finally:
+                    del self._inflight[key]
+            task = asyncio.create_task(_run())
+            self._inflight[key] = task
+            if refresh:
+                task.add_done_callback(_report_refresh_failure)
+        return task
+
+    def _set(self, key: str, entry: CachedResponse) -> None:
+        '''Caches a response, evicting the least recently used ones past `maxsize`.'''
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    async def get(self, key: str, policy: CachePolicy, compute: Callable[[], Awaitable[CachedResponse]], if_none_match: str | None = None) -> Response:
+        '''Returns a key's cached response, computing it if missing or expired.
+        Stale responses are returned immediately while a background task refreshes them.
+        Clients may cache responses for the rest of their `policy.ttl`, and revalidate them with `if_none_match` (the `If-None-Match` header).'''
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            age = monotonic() - entry.created
+            if age < policy.ttl:
+                return entry.to_response('HIT', policy.ttl - age, if_none_match)
+            if age < policy.ttl + policy.stale_ttl:
+                self._compute(key, compute, refresh=True)
+                return entry.to_response('STALE', 0, if_none_match)
+
+        # Shield so a cancelled request doesn't cancel the computation other requests share
+        entry = await asyncio.shield(self._compute(key, compute))
+        return entry.to_response('MISS', policy.ttl - (monotonic() - entry.created), if_none_match)
+
+    def clear(self) -> None:
+        '''Removes all cached responses.'''
+        self._entries.clear()
+
+
+def _report_refresh_failure(task: asyncio.Task) -> None:
+    '''Reports a failed background refresh; the stale response stays cached.'''
+    if not task.cancelled() and task.exception() is not None:
+        print(f'Response refresh failed: {task.exception()}')  # TODO: logging
+
+
+RESPONSE_CACHE = ResponseCache()
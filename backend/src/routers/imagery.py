@@ -1,14 +1,31 @@
 from collections import deque
-from typing import Annotated
-from fastapi import APIRouter, HTTPException, Query, status
+from functools import partial
+from typing import Annotated, Any, Awaitable, Callable
+from fastapi import APIRouter, Header, HTTPException, Query, status
 
 from datetime import date
 
 from src.models import EPICAPICollectionType, EPICAPIImageType, EPICAPIImage, MarsPhotoAPIRoverType, MarsPhotoAPICameraType, MarsPhotoAPIImage, MARS_PHOTO_API_DATA
-from src.apis import get_EPIC_API_images, get_mars_photo_API_images, get_mars_photo_API_metadata
+from src.apis import get_EPIC_API_images, get_MP_API_images, get_MP_API_metadata, iter_EPIC_API_images, iter_MP_API_images, iter_MP_API_metadata
+from src.response_cache import RESPONSE_CACHE, CachePolicy, CachedResponse, create_route_key
+from src.streaming import NDJSON_MEDIA_TYPE, ResponseFormat, create_ndjson_response, wants_ndjson
 
 router = APIRouter(prefix='/imagery', tags=['imagery'])
 
+# EPIC publishes a few series a day and the Mars Photo API updates about once a day
+EPIC_CACHE_POLICY = CachePolicy(ttl=10 * 60, stale_ttl=60 * 60)
+MARS_PHOTO_CACHE_POLICY = CachePolicy(ttl=30 * 60, stale_ttl=6 * 60 * 60)
+EPIC_MAX_RANGE_DAYS = 31
+# Routes can also stream their items as NDJSON
+_NDJSON_RESPONSES = {200: {'content': {NDJSON_MEDIA_TYPE: {}}}}
+_FORMAT_DESCRIPTION = f'Response format: a JSON array, or NDJSON (one item per line) streamed as items arrive. Defaults to NDJSON if the Accept header is {NDJSON_MEDIA_TYPE}, otherwise JSON.'
+
+
+async def _get_response(get_content: Callable[..., Awaitable[Any]], *args: Any) -> CachedResponse:
+    '''Gets and encodes content for caching.'''
+    # Responses depend on the Accept header through the response format
+    return CachedResponse.encode(await get_content(*args), {'Vary': 'Accept'})
+
 
 def _remove_rover_flags(rovers: set[MarsPhotoAPIRoverType]):
     '''Removes flags and updates the rover set.'''
@@ -35,7 +52,7 @@ def _remove_rover_flags(rovers: set[MarsPhotoAPIRoverType]):
     return rovers
 
 
-@router.get('/epic')
+@router.get('/epic', responses=_NDJSON_RESPONSES)
 async def get_EPIC_API(
     collection: Annotated[EPICAPICollectionType, Query(
         description='Kind of imagery to return: natural or enhanced, aersol index, or cloud fraction imagery.')] = EPICAPICollectionType.NATURAL,
@@ -45,24 +62,51 @@ async def get_EPIC_API(
         description='Image type for imagery resolution.')] = EPICAPIImageType.PNG,
     image_date: Annotated[date, Query(
         description='A date string in ISO 8601 format: YYYY-MM-DD',
-        alias='date')] = None
+        alias='date')] = None,
+    start_date: Annotated[date, Query(
+        description='First day (inclusive) of a range of days to return images from, as a date string in ISO 8601 format: YYYY-MM-DD. Requires end_date and can\'t be used with date.')] = None,
+    end_date: Annotated[date, Query(
+        description=f'Last day (inclusive) of a range of days to return images from, at most {EPIC_MAX_RANGE_DAYS} days after start_date, as a date string in ISO 8601 format: YYYY-MM-DD.')] = None,
+    response_format: Annotated[ResponseFormat, Query(
+        description=_FORMAT_DESCRIPTION,
+        alias='format')] = None,
+    accept: Annotated[str, Header(include_in_schema=False)] = None,
+    if_none_match: Annotated[str, Header(include_in_schema=False)] = None
 ) -> deque[EPICAPIImage]:
     '''Returns images of Earth from NASA's EPIC API.
     The EPIC API provides information on the daily imagery collected by DSCOVR's Earth Polychromatic Imaging Camera (EPIC) instrument. Uniquely positioned at the Earth-Sun Lagrange point, EPIC provides full disc imagery of the Earth and captures unique perspectives of certain astronomical events such as lunar transits using a 2048x2048 pixel CCD (Charge Coupled Device) detector coupled to a 30-cm aperture Cassegrain telescope. The API is maintained by the NASA EPIC Team. https://epic.gsfc.nasa.gov/about/api'''
 
+    # Check if a date range is valid
+    if start_date is not None or end_date is not None:
+        if image_date is not None or start_date is None or end_date is None or not 0 <= (end_date - start_date).days <= EPIC_MAX_RANGE_DAYS:
+            raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                                detail=f'start_date and end_date must be used together without date, and end_date must be at most {EPIC_MAX_RANGE_DAYS} days after start_date')
+
+    # Stream items as they arrive if requested
+    if wants_ndjson(response_format, accept):
+        try:
+            return await create_ndjson_response(iter_EPIC_API_images(collection, series, image_type, image_date, start_date, end_date))
+        except Exception as e:
+            print(e)  # TODO: logging
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail='Something went wrong on our end, please try again later.')
+
     # Try to get images from EPIC API
+    key = create_route_key('imagery/epic', collection=collection, series=series,
+                           image_type=image_type, image_date=image_date, start_date=start_date, end_date=end_date)
     try:
-        images = get_EPIC_API_images(
-            collection, series, image_type, image_date)
+        response = await RESPONSE_CACHE.get(key, EPIC_CACHE_POLICY,
+                                            partial(_get_response, get_EPIC_API_images, collection, series, image_type, image_date, start_date, end_date),
+                                            if_none_match)
     except Exception as e:
         print(e)  # TODO: logging
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail='Something went wrong on our end, please try again later.')
 
-    return images
+    return response
 
 
-@router.get('/mars-photo')
+@router.get('/mars-photo', responses=_NDJSON_RESPONSES)
 async def get_mars_photo_API(
     rovers: Annotated[set[MarsPhotoAPIRoverType], Query(
         description='Filter for photos from specific rovers.')] = MarsPhotoAPIRoverType.get_rovers(),
@@ -72,7 +116,12 @@ async def get_mars_photo_API(
         description='A date string in ISO 8601 format "YYYY-MM-DD", starting from the landing date up to the current maximum earth date. If both earth_date and sol aren\'t specified, latest image data is returned.')] = None,
     sol: Annotated[int, Query(
         description='The Martian sol (Martian day) starting from the landing date up to the current maximum sol. If both earth_date and sol aren\'t specified, latest image data is returned.',
-        ge=0)] = None
+        ge=0)] = None,
+    response_format: Annotated[ResponseFormat, Query(
+        description=_FORMAT_DESCRIPTION,
+        alias='format')] = None,
+    accept: Annotated[str, Header(include_in_schema=False)] = None,
+    if_none_match: Annotated[str, Header(include_in_schema=False)] = None
 ) -> deque[MarsPhotoAPIImage]:
     '''Returns images from Mars rovers using the Mars Photo API.
     The Mars Photo API is designed to collect image data gathered by NASA's Curiosity, Opportunity, Spirit, and Perseverance rovers on Mars and make it more easily available to other developers, educators, and citizen scientists. This API is maintained by Chris Cerami. https://mars-photos.herokuapp.com/explore/'''
@@ -95,18 +144,31 @@ async def get_mars_photo_API(
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
                                 detail=f'There are no selected cameras in any of the selected rovers')
 
+    # Stream items as they arrive if requested
+    if wants_ndjson(response_format, accept):
+        try:
+            return await create_ndjson_response(iter_MP_API_images(rovers, cameras, earth_date, sol))
+        except Exception as e:
+            print(e)  # TODO: logging
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail='Something went wrong on our end, please try again later.')
+
     # Try to get images from Mars Photo API
+    key = create_route_key('imagery/mars-photo', rovers=rovers, cameras=cameras,
+                           earth_date=earth_date, sol=sol)
     try:
-        images = get_mars_photo_API_images(rovers, cameras, earth_date, sol)
+        response = await RESPONSE_CACHE.get(key, MARS_PHOTO_CACHE_POLICY,
+                                            partial(_get_response, get_MP_API_images, rovers, cameras, earth_date, sol),
+                                            if_none_match)
     except Exception as e:
         print(e)  # TODO: logging
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail='Something went wrong on our end, please try again later.')
 
-    return images
+    return response
 
 
-@router.get('/mars-photo/meta')
+@router.get('/mars-photo/meta', responses=_NDJSON_RESPONSES)
 async def get_mars_photo_API_metadata(
     rovers: Annotated[set[MarsPhotoAPIRoverType], Query(
         description='Filter for metadata from specific rovers.')] = MarsPhotoAPIRoverType.get_rovers(),
@@ -116,7 +178,18 @@ async def get_mars_photo_API_metadata(
         description='A date string in ISO 8601 format "YYYY-MM-DD", starting from the landing date up to the current maximum earth date. If both earth_date and sol aren\'t specified, latest image data is returned.')] = None,
     sol: Annotated[int, Query(
         description='The Martian sol (Martian day) starting from the landing date up to the current maximum sol. If both earth_date and sol aren\'t specified, latest image data is returned.',
-        ge=0)] = None
+        ge=0)] = None,
+    sol_from: Annotated[int, Query(
+        description='The first Martian sol (inclusive) of a range of photo manifests. Ignored if earth_date or sol is specified.',
+        ge=0)] = None,
+    sol_to: Annotated[int, Query(
+        description='The last Martian sol (inclusive) of a range of photo manifests. Ignored if earth_date or sol is specified.',
+        ge=0)] = None,
+    response_format: Annotated[ResponseFormat, Query(
+        description=_FORMAT_DESCRIPTION,
+        alias='format')] = None,
+    accept: Annotated[str, Header(include_in_schema=False)] = None,
+    if_none_match: Annotated[str, Header(include_in_schema=False)] = None
 ):
     '''Returns metadata from Mars rovers (optionally photo manifests) using the Mars Photo API.
     The Mars Photo API is designed to collect image data gathered by NASA's Curiosity, Opportunity, Spirit, and Perseverance rovers on Mars and make it more easily available to other developers, educators, and citizen scientists. This API is maintained by Chris Cerami. https://mars-photos.herokuapp.com/explore/'''
@@ -124,13 +197,25 @@ async def get_mars_photo_API_metadata(
     # Modify rover set used for querying if flags were used
     rovers = _remove_rover_flags(rovers)
 
+    # Stream items as they arrive if requested
+    if wants_ndjson(response_format, accept):
+        try:
+            return await create_ndjson_response(iter_MP_API_metadata(rovers, manifest, earth_date, sol, sol_from, sol_to))
+        except Exception as e:
+            print(e)  # TODO: logging
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail='Something went wrong on our end, please try again later.')
+
     # Try to get metadata from Mars Photo API
+    key = create_route_key('imagery/mars-photo/meta', rovers=rovers, manifest=manifest,
+                           earth_date=earth_date, sol=sol, sol_from=sol_from, sol_to=sol_to)
     try:
-        metadata = get_mars_photo_API_metadata(
-            rovers, manifest, earth_date, sol)
+        response = await RESPONSE_CACHE.get(key, MARS_PHOTO_CACHE_POLICY,
+                                            partial(_get_response, get_MP_API_metadata, rovers, manifest, earth_date, sol, sol_from, sol_to),
+                                            if_none_match)
     except Exception as e:
         print(e)  # TODO: logging
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail='Something went wrong on our end, please try again later.')
 
-    return metadata
+    return response
@@ -1,13 +1,53 @@
-from typing import Annotated
-from fastapi import APIRouter, HTTPException, Query, status
+from functools import partial
+from typing import Annotated, Awaitable, Callable
+from fastapi import APIRouter, Header, HTTPException, Query, status
 from pydantic import AwareDatetime
 
 from src.helpers import datetime_UTC_Week
 from src.models import Article
-from src.apis import get_all_articles, get_industry_articles, get_science_articles
+from src.apis import decode_article_cursor, encode_article_cursor, get_all_articles, get_industry_articles, get_science_articles
+from src.response_cache import RESPONSE_CACHE, CachePolicy, CachedResponse, create_route_key
 
 router = APIRouter(prefix='/news', tags=['news'])
 
+# Articles change at most once per ingestion poll
+NEWS_CACHE_POLICY = CachePolicy(ttl=60, stale_ttl=5 * 60)
+
+
+def _server_timing_headers(timings: dict[str, float]) -> dict[str, str]:
+    '''Exposes per-source fetch durations (in milliseconds) through the `Server-Timing` header.'''
+    if not timings:
+        return {}
+    return {'Server-Timing': ', '.join(
+        f'{name};dur={duration * 1000:.1f}' for name, duration in timings.items())}
+
+
+def _decode_cursor(cursor: str | None) -> tuple[float, str] | None:
+    '''Decodes a `cursor` query parameter, if given.'''
+    if cursor is None:
+        return None
+    try:
+        return decode_article_cursor(cursor)
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                            detail='cursor must be a value of the X-Next-Cursor header of a previous response')
+
+
+async def _get_articles_response(
+        get_articles: Callable[..., Awaitable[list[Article]]],
+        earliest_datetime: AwareDatetime,
+        limit: int,
+        after: tuple[float, str] | None
+) -> CachedResponse:
+    '''Gets and encodes articles for caching.
+    If the page is full, the cursor of the next page is returned in the `X-Next-Cursor` header.'''
+    timings = {}
+    articles = await get_articles(earliest_datetime, limit, timings, after)
+    headers = _server_timing_headers(timings)
+    if articles and len(articles) == limit:
+        headers['X-Next-Cursor'] = encode_article_cursor(articles[-1])
+    return CachedResponse.encode(articles, headers)
+
 
 @router.get('/')
 async def get_space_news(
@@ -15,18 +55,25 @@ async def get_space_news(
             description="ISO-8601 timezone-aware datetime string for returning articles after this datetime.")] = datetime_UTC_Week(),
         limit: Annotated[int, Query(
             description="Amount of articles to return.",
-            ge=0)] = 10
+            ge=0)] = 10,
+        cursor: Annotated[str, Query(
+            description="Opaque cursor from the X-Next-Cursor header of a previous response, for returning the next page of articles.")] = None,
+        if_none_match: Annotated[str, Header(include_in_schema=False)] = None
 ) -> list[Article]:
     '''Returns articles on space industry and/or science news.'''
     # Try to get articles
+    after = _decode_cursor(cursor)
+    key = create_route_key('news', earliest_datetime=earliest_datetime, limit=limit, after=after)
     try:
-        articles = get_all_articles(earliest_datetime, limit)
+        response = await RESPONSE_CACHE.get(key, NEWS_CACHE_POLICY,
+                                            partial(_get_articles_response, get_all_articles, earliest_datetime, limit, after),
+                                            if_none_match)
     except Exception as e:
         print(e)  # TODO: logging
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail='Something went wrong on our end, please try again later.')
 
-    return articles
+    return response
 
 
 @router.get('/industry')
@@ -35,18 +82,25 @@ async def get_space_industry_news(
             description="ISO-8601 timezone-aware datetime string for returning articles after this datetime.")] = datetime_UTC_Week(),
         limit: Annotated[int, Query(
             description="Amount of articles to return.",
-            ge=0)] = 10
+            ge=0)] = 10,
+        cursor: Annotated[str, Query(
+            description="Opaque cursor from the X-Next-Cursor header of a previous response, for returning the next page of articles.")] = None,
+        if_none_match: Annotated[str, Header(include_in_schema=False)] = None
 ) -> list[Article]:
     '''Returns articles on space industry news.'''
     # Try to get articles
+    after = _decode_cursor(cursor)
+    key = create_route_key('news/industry', earliest_datetime=earliest_datetime, limit=limit, after=after)
     try:
-        articles = get_industry_articles(earliest_datetime, limit)
+        response = await RESPONSE_CACHE.get(key, NEWS_CACHE_POLICY,
+                                            partial(_get_articles_response, get_industry_articles, earliest_datetime, limit, after),
+                                            if_none_match)
     except Exception as e:
         print(e)  # TODO: logging
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail='Something went wrong on our end, please try again later.')
 
-    return articles
+    return response
 
 
 @router.get('/science')
@@ -55,15 +109,22 @@ async def get_space_science_news(
             description="ISO-8601 timezone-aware datetime string for returning articles after this datetime.")] = datetime_UTC_Week(),
         limit: Annotated[int, Query(
             description="Amount of articles to return.",
-            ge=0)] = 10
+            ge=0)] = 10,
+        cursor: Annotated[str, Query(
+            description="Opaque cursor from the X-Next-Cursor header of a previous response, for returning the next page of articles.")] = None,
+        if_none_match: Annotated[str, Header(include_in_schema=False)] = None
 ) -> list[Article]:
     '''Returns articles on space science news.'''
     # Try to get articles
+    after = _decode_cursor(cursor)
+    key = create_route_key('news/science', earliest_datetime=earliest_datetime, limit=limit, after=after)
     try:
-        articles = get_science_articles(earliest_datetime, limit)
+        response = await RESPONSE_CACHE.get(key, NEWS_CACHE_POLICY,
+                                            partial(_get_articles_response, get_science_articles, earliest_datetime, limit, after),
+                                            if_none_match)
     except Exception as e:
         print(e)  # TODO: logging
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail='Something went wrong on our end, please try again later.')
 
-    return articles
+    return response
@@ -0,0 +1,191 @@
+import asyncio
+from datetime import date
+import os
+from pathlib import Path
+import sqlite3
+from typing import Any
+
+from src.client import get_http_client_pool, http_client_lifespan
+from src.models import MarsPhotoAPICamera, MarsPhotoAPIImage, MarsPhotoAPIRoverType, MARS_PHOTO_API_ROVERS
+
+MARS_PHOTO_API_URL = 'https://mars-photos.herokuapp.com/api/v1'
+ROVER_SNAPSHOT_PATH = Path(__file__).parent / 'data' / 'inactive_rovers.sqlite'
+
+_SCHEMA = '''
+    CREATE TABLE rovers (
+        rover TEXT PRIMARY KEY,
+        max_sol INTEGER NOT NULL
+    );
+    CREATE TABLE manifests (
+        rover TEXT NOT NULL,
+        sol INTEGER NOT NULL,
+        earth_date TEXT NOT NULL,
+        total_photos INTEGER NOT NULL,
+        cameras TEXT NOT NULL,
+        PRIMARY KEY (rover, sol)
+    ) WITHOUT ROWID;
+    CREATE TABLE photos (
+        rover TEXT NOT NULL,
+        sol INTEGER NOT NULL,
+        earth_date TEXT NOT NULL,
+        camera TEXT NOT NULL,
+        camera_name TEXT NOT NULL,
+        image TEXT NOT NULL
+    );
+    CREATE INDEX photos_sol_idx ON photos(rover, sol, camera);
+    CREATE INDEX photos_earth_date_idx ON photos(rover, earth_date, camera);
+'''
+
+
+class RoverSnapshot:
+    '''Read-only snapshot of inactive rovers' photos and manifests, which never change, so they're served without the Mars Photo API.
+    The snapshot is built once with `python -m src.rover_snapshot`.
+    The database file is `path`, or the `ROVER_SNAPSHOT_PATH` environment variable (default: "src/data/inactive_rovers.sqlite").
+    It's opened memory-mapped and immutable on first use; if it doesn't exist, no rovers are in the snapshot.'''
+
+    def __init__(self, path: str | os.PathLike | None = None):
+        self.path = path
+        self._connection: sqlite3.Connection | None = None
+        self._rovers: dict[str, int] | None = None
+
+    @property
+    def connection(self) -> sqlite3.Connection | None:
+        '''Database connection, opened on first use, or `None` if there's no snapshot.'''
+        if self._connection is None:
+            path = Path(self.path or os.getenv(
+                'ROVER_SNAPSHOT_PATH', ROVER_SNAPSHOT_PATH))
+            if not path.is_file():
+                return None
+            # Immutable skips locking and change detection, since the file is never written after it's built
+            self._connection = sqlite3.connect(
+                f'{path.resolve().as_uri()}?mode=ro&immutable=1', uri=True, check_same_thread=False)
+            self._connection.execute(
+                f'PRAGMA mmap_size={path.stat().st_size}')
+        return self._connection
+
+    @property
+    def rovers(self) -> dict[str, int]:
+        '''Rovers in the snapshot mapped to their final sol.'''
+        if self._rovers is None:
+            con = self.connection
+            self._rovers = dict(con.execute(
+                'SELECT rover, max_sol FROM rovers')) if con is not None else {}
+        return self._rovers
+
+    def has_rover(self, rover: MarsPhotoAPIRoverType) -> bool:
+        '''Returns whether a rover can be served from the snapshot, which only ever holds inactive rovers.'''
+        return not MARS_PHOTO_API_ROVERS[rover].active and rover in self.rovers
+
+    def get_photos(
+            self,
+            rover: MarsPhotoAPIRoverType,
+            cameras: set[str] | None,
+            earth_date: date | None,
+            sol: int | None
+    ) -> list[MarsPhotoAPIImage]:
+        '''Returns a rover's photos for a sol or an earth date (like the Mars Photo API, sol takes precedence), or from its final sol if neither is given.
+        Photos are optionally filtered for cameras.'''
+        if sol is None and earth_date is None:
+            sol = self.rovers[rover]
+        query = 'SELECT sol, earth_date, camera, camera_name, image FROM photos WHERE rover = ?'
+        args: list[Any] = [rover]
+        if sol is not None:
+            query += ' AND sol = ?'
+            args.append(sol)
+        else:
+            query += ' AND earth_date = ?'
+            args.append(earth_date.isoformat())
+        if cameras:
+            query += f" AND camera IN ({', '.join('?' * len(cameras))})"
+            args.extend(camera.upper() for camera in cameras)
+        query += ' ORDER BY rowid'
+
+        rover_name = MARS_PHOTO_API_ROVERS[rover].name
+        images = []
+        for item_sol, item_earth_date, camera, camera_name, image in self.connection.execute(query, args):
+            images.append(MarsPhotoAPIImage(rover_name=rover_name,
+                                            camera=MarsPhotoAPICamera.get(camera, camera_name),
+                                            image=image,
+                                            earth_date=item_earth_date,
+                                            sol=item_sol))
+        return images
+
+    def get_photo_manifest(self, rover: MarsPhotoAPIRoverType) -> dict[str, Any]:
+        '''Returns a rover's photo manifest in the shape of the Mars Photo API's `photo_manifest`.'''
+        rows = self.connection.execute(
+            'SELECT sol, earth_date, total_photos, cameras FROM manifests WHERE rover = ? ORDER BY sol', (rover,))
+        return {'photos': [{'sol': sol, 'earth_date': earth_date, 'total_photos': total_photos, 'cameras': cameras.split(',')}
+                           for sol, earth_date, total_photos, cameras in rows]}
+
+    def close(self) -> None:
+        '''Closes the database connection, if open.'''
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+        self._rovers = None
+
+
+def write_rover_snapshot(path: str | os.PathLike, rover_data: dict[str, tuple[dict[str, Any], list[dict[str, Any]]]]) -> None:
+    '''Writes a snapshot file from each rover's Mars Photo API `photo_manifest` and photo items.
+    The file is written next to `path` and then moved into place, so readers never see a partial snapshot.'''
+    path = Path(path)
+    tmp_path = path.with_name(f'{path.name}.tmp')
+    tmp_path.unlink(missing_ok=True)
+    con = sqlite3.connect(tmp_path)
+    try:
+        with con:
+            con.executescript(_SCHEMA)
+            for rover, (photo_manifest, photos) in rover_data.items():
+                con.execute('INSERT INTO rovers (rover, max_sol) VALUES (?, ?)',
+                            (rover, photo_manifest['max_sol']))
+                con.executemany('INSERT INTO manifests (rover, sol, earth_date, total_photos, cameras) VALUES (?, ?, ?, ?, ?)',
+                                ((rover, item['sol'], item['earth_date'], item['total_photos'], ','.join(item['cameras']))
+                                 for item in photo_manifest['photos']))
+                # Photos keep the API's order by being inserted in it
+                con.executemany('INSERT INTO photos (rover, sol, earth_date, camera, camera_name, image) VALUES (?, ?, ?, ?, ?, ?)',
+                                ((rover, item['sol'], item['earth_date'], item['camera']['name'], item['camera']['full_name'], item['img_src'])
+                                 for item in photos))
+        con.execute('VACUUM')
+    finally:
+        con.close()
+    os.replace(tmp_path, path)
+
+
+async def _get_json(url: str, params: dict[str, Any] | None = None) -> Any:
+    '''Requests json-encoded content from the Mars Photo API, raising on errors.'''
+    res = await get_http_client_pool().get(url, params)
+    res.raise_for_status()
+    return res.json()
+
+
+async def fetch_rover_data(rover: MarsPhotoAPIRoverType, max_concurrent_sols: int = 4) -> tuple[dict[str, Any], list[dict[str, Any]]]:
+    '''Fetches a rover's photo manifest and all of its photos, a sol at a time.'''
+    res = await _get_json(f'{MARS_PHOTO_API_URL}/manifests/{rover}')
+    photo_manifest = res['photo_manifest']
+
+    semaphore = asyncio.Semaphore(max_concurrent_sols)
+
+    async def _get_sol_photos(sol: int) -> list[dict[str, Any]]:
+        async with semaphore:
+            res = await _get_json(f'{MARS_PHOTO_API_URL}/rovers/{rover}/photos', {'sol': sol})
+            return res['photos']
+
+    sol_photos = await asyncio.gather(*(_get_sol_photos(item['sol']) for item in photo_manifest['photos']))
+    return photo_manifest, [photo for photos in sol_photos for photo in photos]
+
+
+async def build_rover_snapshot(path: str | os.PathLike = ROVER_SNAPSHOT_PATH) -> None:
+    '''Builds the snapshot of all inactive rovers from the Mars Photo API.'''
+    rover_data = {}
+    for rover in sorted(MarsPhotoAPIRoverType.get_inactive_rovers()):
+        print(f'Fetching {rover}...')
+        rover_data[rover] = await fetch_rover_data(rover)
+    write_rover_snapshot(path, rover_data)
+    print(f'Wrote {path}')
+
+
+if __name__ == '__main__':
+    async def _main():
+        async with http_client_lifespan():
+            await build_rover_snapshot(os.getenv('ROVER_SNAPSHOT_PATH', ROVER_SNAPSHOT_PATH))
+    asyncio.run(_main())
@@ -0,0 +1,47 @@
+from dataclasses import dataclass
+from io import BytesIO
+from typing import Iterator
+
+from lxml import etree
+
+
+@dataclass(kw_only=True)
+class RSSItem:
+    '''Dataclass for the fields of an RSS feed item needed to create an `Article`.'''
+    guid: str
+    title: str
+    link: str
+    description: str
+    category: str
+    pub_date: str
+    thumbnail: str | None = None
+
+
+# Local tag name (namespaces ignored) -> RSSItem field
+_ITEM_FIELDS = {
+    'guid': 'guid',
+    'title': 'title',
+    'link': 'link',
+    'description': 'description',
+    'category': 'category',
+    'pubDate': 'pub_date',
+}
+
+
+def iter_rss_items(content: bytes) -> Iterator[RSSItem]:
+    '''Parses an RSS document incrementally and yields its items as they are read.
+    Each item's element is cleared once yielded, so memory stays bounded and the caller can stop early.'''
+    for _, element in etree.iterparse(BytesIO(content), events=('end',), tag='{*}item'):
+        fields = {}
+        for child in element:
+            name = etree.QName(child).localname
+            if name in _ITEM_FIELDS:
+                fields[_ITEM_FIELDS[name]] = (child.text or '').strip()
+            elif name == 'thumbnail':
+                fields['thumbnail'] = child.get('url')
+        yield RSSItem(**fields)
+
+        # Free the processed item and any preceding siblings
+        element.clear(keep_tail=True)
+        while element.getprevious() is not None:
+            del element.getparent()[0]
@@ -0,0 +1,49 @@
+import asyncio
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable
+
+
+@dataclass(frozen=True, kw_only=True)
+class Job:
+    '''A coroutine function run periodically by the `Scheduler`.
+        Attributes:
+            name (str): Unique name of the job.
+            fn (Callable[[], Awaitable[Any]]): Coroutine function to run.
+            interval (float): Seconds to wait between the end of a run and the start of the next one.
+    '''
+    name: str
+    fn: Callable[[], Awaitable[Any]]
+    interval: float
+
+
+class Scheduler:
+    '''Runs jobs periodically in the background of the event loop, starting with an immediate run.'''
+
+    def __init__(self):
+        self.jobs: dict[str, Job] = {}
+        self._tasks: list[asyncio.Task] = []
+
+    def add_job(self, name: str, fn: Callable[[], Awaitable[Any]], interval: float) -> None:
+        '''Adds a job to be run every `interval` seconds once the scheduler is started.'''
+        self.jobs[name] = Job(name=name, fn=fn, interval=interval)
+
+    async def _run_job(self, job: Job) -> None:
+        '''Runs a job forever, keeping it scheduled if a run fails.'''
+        while True:
+            try:
+                await job.fn()
+            except Exception as e:
+                print(f'Job "{job.name}" failed: {e}')  # TODO: logging
+            await asyncio.sleep(job.interval)
+
+    def start(self) -> None:
+        '''Starts running all jobs in the background.'''
+        self._tasks = [asyncio.create_task(self._run_job(job), name=job.name)
+                       for job in self.jobs.values()]
+
+    async def stop(self) -> None:
+        '''Cancels all running jobs and waits for them to finish.'''
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
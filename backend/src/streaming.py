@@ -0,0 +1,73 @@
+from enum import StrEnum, auto
+from typing import Any, AsyncIterator
+
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import StreamingResponse
+from starlette.datastructures import Headers
+from starlette.middleware.gzip import GZipResponder
+from starlette.types import Message, Receive, Scope, Send
+
+from src.response_cache import encode_json
+
+NDJSON_MEDIA_TYPE = 'application/x-ndjson'
+
+
+class ResponseFormat(StrEnum):
+    '''Enum for route response format.'''
+    JSON: str = auto()
+    NDJSON: str = auto()
+
+
+def wants_ndjson(response_format: ResponseFormat | None, accept: str | None) -> bool:
+    '''Returns whether a request opted into NDJSON, with the `format` query parameter or else the `Accept` header.'''
+    if response_format is not None:
+        return response_format == ResponseFormat.NDJSON
+    return accept is not None and NDJSON_MEDIA_TYPE in accept
+
+
+async def _iter_ndjson(items: AsyncIterator[Any], first: Any) -> AsyncIterator[bytes]:
+    '''Encodes items to JSON lines as they're yielded.'''
+    try:
+        yield encode_json(first) + b'\n'
+        async for item in items:
+            yield encode_json(item) + b'\n'
+    except Exception as e:
+        # The status was already sent, so the stream just ends early
+        print(e)  # TODO: logging
+    finally:
+        await items.aclose()
+
+
+async def create_ndjson_response(items: AsyncIterator[Any]) -> StreamingResponse:
+    '''Creates a response streaming items as newline-delimited JSON, one item per line, as they're yielded.
+    The first item is awaited before the response starts, so errors getting it are raised instead of ending the stream.'''
+    try:
+        first = await anext(items)
+    except StopAsyncIteration:
+        return StreamingResponse(iter(()), media_type=NDJSON_MEDIA_TYPE, headers={'Vary': 'Accept'})
+    return StreamingResponse(_iter_ndjson(items, first), media_type=NDJSON_MEDIA_TYPE, headers={'Vary': 'Accept'})
+
+
+class _StreamingGZipResponder(GZipResponder):
+    '''Compresses a response like `GZipResponder`, unless it's NDJSON.'''
+
+    async def send_with_gzip(self, message: Message) -> None:
+        if message['type'] == 'http.response.start':
+            content_type = Headers(raw=message['headers']).get('Content-Type', '')
+            if content_type.startswith(NDJSON_MEDIA_TYPE):
+                # Sent as is, like responses that are already encoded
+                self.initial_message = message
+                self.content_encoding_set = True
+                return
+        await super().send_with_gzip(message)
+
+
+class StreamingGZipMiddleware(GZipMiddleware):
+    '''`GZipMiddleware` that doesn't compress NDJSON responses, since gzip would buffer lines until enough of them fill a block.'''
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] == 'http' and 'gzip' in Headers(scope=scope).get('Accept-Encoding', ''):
+            responder = _StreamingGZipResponder(self.app, self.minimum_size, compresslevel=self.compresslevel)
+            await responder(scope, receive, send)
+            return
+        await self.app(scope, receive, send)
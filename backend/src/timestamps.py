@@ -0,0 +1,74 @@
+from datetime import datetime, timedelta, UTC
+from functools import lru_cache
+
+from dateutil import parser
+from pydantic import AwareDatetime
+
+from src.helpers import datetime_UTC
+
+_MONTHS = {month: i for i, month in enumerate(
+    ('Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec'), start=1)}
+_UTC_ZONES = {'GMT', 'UT', 'UTC', 'Z'}
+
+
+def _parse_rfc822(value: str) -> AwareDatetime | None:
+    '''Parses an RFC 822 datetime (e.g. "Wed, 02 Oct 2002 13:00:00 GMT" or "... +0200"), or returns `None` if it isn't one.'''
+    parts = value.split()
+    # Day of the week is optional
+    if parts and parts[0].endswith(','):
+        parts = parts[1:]
+    if len(parts) != 5:
+        return None
+    day, month, year, time, zone = parts
+    month = _MONTHS.get(month[:3].title())
+    if month is None:
+        return None
+    # Two-digit years (RFC 822's own form) are left to dateutil, which picks their century
+    if len(year) != 4 or not year.isdigit():
+        return None
+
+    # Seconds are optional
+    time = time.split(':')
+    if len(time) == 2:
+        time.append('0')
+    elif len(time) != 3:
+        return None
+
+    # Zone is either a UTC name or a numeric +hhmm/-hhmm offset
+    if zone in _UTC_ZONES:
+        offset = 0
+    elif len(zone) == 5 and zone[0] in '+-' and zone[1:].isdigit():
+        offset = int(zone[1:3]) * 60 + int(zone[3:])
+        if zone[0] == '-':
+            offset = -offset
+    else:
+        return None
+
+    try:
+        hour, minute, second = (int(x) for x in time)
+        dt = datetime(int(year), month, int(day), hour, minute, second, tzinfo=UTC)
+    except ValueError:
+        return None
+    return dt - timedelta(minutes=offset)
+
+
+def _parse_iso8601(value: str) -> AwareDatetime | None:
+    '''Parses an ISO 8601 datetime, including the EPIC API's "YYYY-MM-DD HH:MM:SS", or returns `None` if it isn't one.'''
+    try:
+        return datetime_UTC(datetime.fromisoformat(value))
+    except ValueError:
+        return None
+
+
+@lru_cache(maxsize=4096)
+def parse_datetime(value: str) -> AwareDatetime:
+    '''Parses a datetime string into a UTC datetime, assuming UTC for naive values.
+    RFC 822 and ISO 8601 strings take fast paths, and anything else falls back to `dateutil`. Results are memoized.'''
+    # ISO 8601 strings start with the year, RFC 822 ones usually with the day of the week
+    if value[:1].isdigit():
+        dt = _parse_iso8601(value) or _parse_rfc822(value)
+    else:
+        dt = _parse_rfc822(value)
+    if dt is None:
+        dt = datetime_UTC(parser.parse(value))
+    return dt
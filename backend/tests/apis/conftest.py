@@ -1,5 +1,8 @@
 from dataclasses import dataclass
+from datetime import datetime, UTC
 import pytest
+from src.apis.get_articles import ARTICLE_STORE, _SOURCE_TIMINGS
+from src.apis.get_imagery import _EPIC_collections
 from src.models import Article
 from src.helpers import datetime_UTC_Week
 from unittest.mock import patch
@@ -20,9 +23,10 @@ class PytestParamApis:
 def mock_articles() -> list[Article]:
     # Mocks extracted article data from sources
     articles = []
+    now = datetime.now(UTC).timestamp()
     for i in range(10):
         article = Article(title=f'title_{i}', content=f'content_{i}', author=f'author_{i}', image=f'image_{i}',
-                          url=f'https://example{i}.com/', timestamp=i, category='Test')
+                          url=f'https://example{i}.com/', timestamp=now - 10 + i, category='Test')
         articles.append(article)
     return articles
 
@@ -38,3 +42,18 @@ def mock_articles_result(mock_articles) -> list[Article]:
 @pytest.fixture(scope='module')
 def mock_datetime():
     return datetime_UTC_Week()
+
+
+@pytest.fixture(autouse=True)
+def reset_article_store():
+    # Start every test with an empty, never polled article store
+    ARTICLE_STORE.clear()
+    _SOURCE_TIMINGS.clear()
+    yield
+
+
+@pytest.fixture(autouse=True)
+def reset_EPIC_collections():
+    # Start every test without EPIC collection snapshots
+    _EPIC_collections.clear()
+    yield
@@ -1,45 +1,186 @@
-from src.apis.get_articles import get_SNAPI_articles, get_physorg_articles, get_industry_articles, get_science_articles, get_all_articles
-from unittest.mock import patch
+from src.apis.get_articles import ARTICLE_STORE, PHYSORG_FEEDS, NewsBatch, PHYSORG_SOURCE, poll_news_source, decode_article_cursor, encode_article_cursor, get_SNAPI_articles, get_physorg_feed_articles, get_physorg_articles, get_industry_articles, get_science_articles, get_all_articles
+from datetime import datetime, timedelta, UTC
+from email.utils import format_datetime
+import httpx
+import pytest
+from tests.conftest import run_async
+from unittest.mock import AsyncMock, patch
 
 
 limit = 5
 
 
 def test_get_SNAPI_articles(mock_datetime):
-    articles = get_SNAPI_articles(mock_datetime)
+    articles = run_async(get_SNAPI_articles(mock_datetime))
     assert articles
     # Test that articles are returned after the earliest datetime
     timestamp = mock_datetime.timestamp()
     assert all(article.timestamp >= timestamp for article in articles)
 
 
+def _SNAPI_item(published_at: str) -> dict:
+    return {'title': published_at, 'summary': '', 'news_site': 'Test', 'image_url': '',
+            'url': f'https://example.com/{published_at}', 'published_at': published_at}
+
+
+@patch('src.apis.get_articles.request_get_json_cached', new_callable=AsyncMock)
+def test_get_SNAPI_articles_window(mock_request):
+    mock_request.return_value = {'count': 3, 'results': [_SNAPI_item('2025-05-17T12:00:00Z'),
+                                                         _SNAPI_item('2025-05-17T06:00:00Z'),
+                                                         _SNAPI_item('2025-05-17T01:00:00Z')]}
+    articles = run_async(get_SNAPI_articles(datetime(2025, 5, 17, 6, tzinfo=UTC)))
+    run_async(get_SNAPI_articles(datetime(2025, 5, 17, 9, tzinfo=UTC)))
+
+    # Verify both queries requested the same day-aligned window
+    params = [call.kwargs['params'] for call in mock_request.call_args_list]
+    assert params[0] == params[1]
+    assert params[0]['published_at_gte'] == datetime(2025, 5, 17, tzinfo=UTC)
+    # Verify the window was filtered for the earliest datetime
+    assert [article.title for article in articles] == ['2025-05-17T12:00:00Z', '2025-05-17T06:00:00Z']
+
+
+@patch('src.apis.get_articles.request_get_json_cached', new_callable=AsyncMock)
+def test_get_SNAPI_articles_pages(mock_request, mock_datetime):
+    first_page = {'count': 250, 'results': [_SNAPI_item(f'2030-01-01T00:00:{i:02}Z') for i in range(50)]}
+
+    async def _get_page(url, params):
+        offset = params.get('offset', 0)
+        if offset == 0:
+            return first_page
+        return {'count': 250, 'results': [_SNAPI_item(f'2030-01-0{offset // 100 + 1}T00:00:{i:02}Z') for i in range(50)]}
+    mock_request.side_effect = _get_page
+
+    # Verify repeated calls don't grow the (cached) first page
+    for _ in range(2):
+        articles = run_async(get_SNAPI_articles(mock_datetime, page_size=100))
+        assert len(articles) == len({article.url for article in articles}) == 150
+    assert len(first_page['results']) == 50
+    offsets = [call.kwargs['params'].get('offset') for call in mock_request.call_args_list]
+    assert offsets == [None, 100, 200] * 2
+
+
 def test_get_physorg_articles(mock_datetime):
-    articles = get_physorg_articles(mock_datetime)
+    articles = run_async(get_physorg_articles(mock_datetime)).articles.values()
     assert articles
     # Test that articles are returned after the datetime
     timestamp = mock_datetime.timestamp()
     assert all(article.timestamp >= timestamp for article in articles)
 
 
+@patch('src.apis.get_articles.request_get_conditional')
+def test_get_physorg_feed_articles_not_modified(mock_request, mock_datetime):
+    # A feed that hasn't changed since the last request isn't parsed
+    mock_request.return_value = None
+    batch = run_async(get_physorg_feed_articles(
+        PHYSORG_FEEDS['physorg_astronomy'], mock_datetime))
+    assert not batch.articles and not batch.feed_validators
+
+
 @patch('src.apis.get_articles.get_SNAPI_articles')
 def test_get_industry_articles(mock_SNAPI, mock_articles, mock_datetime, mock_articles_result):
     mock_SNAPI.return_value = mock_articles
-    articles = get_industry_articles(mock_datetime, limit)
+    articles = run_async(get_industry_articles(mock_datetime, limit))
     assert articles == mock_articles_result
 
 
 @patch('src.apis.get_articles.get_physorg_articles')
 def test_get_science_articles(mock_physorg, mock_articles, mock_datetime, mock_articles_result):
-    mock_physorg.return_value = mock_articles
-    articles = get_science_articles(mock_datetime, limit)
+    mock_physorg.return_value = NewsBatch(articles={article.url: article for article in mock_articles})
+    articles = run_async(get_science_articles(mock_datetime, limit))
     assert articles == mock_articles_result
 
 
-@patch('src.apis.get_articles.get_industry_articles')
-@patch('src.apis.get_articles.get_science_articles')
-def test_get_all_articles(mock_science, mock_industry, mock_articles, mock_datetime, mock_articles_result):
+@patch('src.apis.get_articles.get_SNAPI_articles')
+@patch('src.apis.get_articles.get_physorg_articles')
+def test_get_all_articles(mock_physorg, mock_SNAPI, mock_articles, mock_datetime, mock_articles_result):
     # Ensure results are combined (they will be for this case)
-    mock_industry.return_value = mock_articles[:3]
-    mock_science.return_value = mock_articles[3:]
-    articles = get_all_articles(mock_datetime, limit)
+    mock_SNAPI.return_value = mock_articles[:3]
+    mock_physorg.return_value = NewsBatch(articles={article.url: article for article in mock_articles[3:]})
+    articles = run_async(get_all_articles(mock_datetime, limit))
     assert articles == mock_articles_result
+
+
+@patch('src.apis.get_articles.get_SNAPI_articles')
+def test_get_industry_articles_polls_once(mock_SNAPI, mock_articles, mock_datetime):
+    # Sources are fetched on the request path only until they have been polled
+    mock_SNAPI.return_value = mock_articles
+    run_async(get_industry_articles(mock_datetime, limit))
+    run_async(get_industry_articles(mock_datetime, limit))
+    mock_SNAPI.assert_called_once()
+
+
+@patch('src.apis.get_articles.get_SNAPI_articles')
+def test_get_industry_articles_upstream_down(mock_SNAPI, mock_articles, mock_datetime, mock_articles_result):
+    mock_SNAPI.side_effect = RuntimeError('upstream down')
+    # Verify a failed poll of an empty store is served as no articles
+    assert run_async(get_industry_articles(mock_datetime, limit)) == []
+    mock_SNAPI.assert_called_once()
+
+    # Verify stored articles are served without polling on the request path (e.g. after a restart)
+    mock_SNAPI.reset_mock()
+    ARTICLE_STORE.ingest('snapi', mock_articles)
+    assert run_async(get_industry_articles(mock_datetime, limit)) == mock_articles_result
+    mock_SNAPI.assert_not_called()
+
+
+@patch('src.apis.get_articles.get_SNAPI_articles')
+def test_get_industry_articles_cursor(mock_SNAPI, mock_articles, mock_datetime):
+    mock_SNAPI.return_value = mock_articles
+    first_page = run_async(get_industry_articles(mock_datetime, 4))
+    after = decode_article_cursor(encode_article_cursor(first_page[-1]))
+    second_page = run_async(get_industry_articles(mock_datetime, 4, after=after))
+
+    # Verify pages resume where the previous one ended
+    newest = sorted(mock_articles, key=lambda x: x.timestamp, reverse=True)
+    assert first_page + second_page == newest[:8]
+
+
+@pytest.mark.parametrize('cursor', ['invalid', 'WzFd', 'eyJhIjoxfQ=='])
+def test_decode_article_cursor_invalid(cursor):
+    with pytest.raises(ValueError):
+        decode_article_cursor(cursor)
+
+
+def _rss(*items: tuple[str, datetime]) -> bytes:
+    entries = ''.join(f'''<item><guid>{guid}</guid><title>{guid}</title><link>https://phys.org/{guid}</link>
+        <description>{guid}</description><category>Astronomy</category><pubDate>{format_datetime(dt, usegmt=True)}</pubDate></item>'''
+                      for guid, dt in items)
+    return f'<?xml version="1.0"?><rss version="2.0"><channel>{entries}</channel></rss>'.encode()
+
+
+def _physorg_feeds(**feeds: bytes | Exception):
+    '''Mocks `request_get_conditional` with each phys.org feed's content (by feed name), error, or no changes if missing.'''
+    async def _request(url, **kwargs):
+        name = next(name for name, feed_url in PHYSORG_FEEDS.items() if feed_url == url)
+        content = feeds.get(name.removeprefix('physorg_'))
+        if isinstance(content, Exception):
+            raise content
+        return None if content is None else httpx.Response(200, content=content, headers={'ETag': f'"{name}"'})
+    return patch('src.apis.get_articles.request_get_conditional', side_effect=_request)
+
+
+def test_poll_physorg_older_item_in_other_feed():
+    now = datetime.now(UTC).replace(microsecond=0)
+    with _physorg_feeds(astronomy=_rss(('a1', now))):
+        run_async(poll_news_source(PHYSORG_SOURCE))
+    # Verify a new item older than another feed's newest article is still stored
+    with _physorg_feeds(astrobiology=_rss(('b1', now - timedelta(minutes=5)))):
+        run_async(poll_news_source(PHYSORG_SOURCE))
+    assert [article.title for article in ARTICLE_STORE.iter_newest('physorg', 0)] == ['a1', 'b1']
+
+
+def test_poll_physorg_feed_failure():
+    now = datetime.now(UTC).replace(microsecond=0)
+    feeds = {'astronomy': _rss(('g1', now))}
+    with _physorg_feeds(**feeds, astrobiology=httpx.TimeoutException('timeout')):
+        with pytest.raises(ExceptionGroup):
+            run_async(poll_news_source(PHYSORG_SOURCE))
+    # Verify nothing of the failed poll was saved
+    assert not ARTICLE_STORE.is_seen('g1')
+    assert ARTICLE_STORE.get_feed_validators(PHYSORG_FEEDS['physorg_astronomy']) == (None, None)
+
+    # Verify the next poll stores the article
+    with _physorg_feeds(**feeds):
+        run_async(poll_news_source(PHYSORG_SOURCE))
+    assert ARTICLE_STORE.is_seen('g1')
+    assert [article.title for article in ARTICLE_STORE.iter_newest('physorg', 0)] == ['g1']
@@ -1,7 +1,11 @@
+import asyncio
 from datetime import date
 from typing import Any
-from src.models import EPICAPICollectionType, EPICAPIImageType, MarsPhotoAPIRoverType, MarsPhotoAPICameraType
+from src.models import EPICAPICollectionType, EPICAPIImageType, MarsPhotoAPIRoverType, MarsPhotoAPICameraType, MARS_PHOTO_API_ROVERS
 from src.apis import get_EPIC_API_images, get_MP_API_images, get_MP_API_metadata
+from src.apis.get_imagery import get_rover_status, plan_MP_API_queries, refresh_rover_status
+from src.manifest_index import ManifestIndex
+from tests.conftest import run_async
 from unittest.mock import patch
 import pytest
 
@@ -88,7 +92,7 @@ def get_MP_API_metadata_args(rovers_arg: set[MarsPhotoAPIRoverType], manifest_ar
 )
 def test_get_EPIC_API_images(get_EPIC_API_images_args):
     # Verify function can call API and return images
-    images = get_EPIC_API_images(**get_EPIC_API_images_args)
+    images = run_async(get_EPIC_API_images(**get_EPIC_API_images_args))
     assert images, '"get_EPIC_API_images()" must return a non-empty deque.'
     collection, series, image_type, image_date = get_EPIC_API_images_args.values()
     # Verify correct collection type is used
@@ -110,7 +114,7 @@ def test_get_EPIC_API_images(get_EPIC_API_images_args):
 @patch('src.apis.get_imagery.request_get_json_cached')
 def test_get_EPIC_API_images_empty_response(mock_EPIC_API, get_EPIC_API_images_args):
     mock_EPIC_API.return_value = []
-    images = get_EPIC_API_images(**get_EPIC_API_images_args)
+    images = run_async(get_EPIC_API_images(**get_EPIC_API_images_args))
     assert not images, '"get_EPIC_API_images()" must return an empty deque.'
 
 
@@ -129,8 +133,8 @@ def test_get_EPIC_API_images_empty_response(mock_EPIC_API, get_EPIC_API_images_a
 )
 def test_get_MP_API_images(get_MP_API_images_args):
     # Verify function can call API and return images
-    images = get_MP_API_images(
-        **get_MP_API_images_args)
+    images = run_async(get_MP_API_images(
+        **get_MP_API_images_args))
     rovers, cameras, earth_date, sol = get_MP_API_images_args.values()
     # Verify correct rover type is used
     assert not any(
@@ -153,6 +157,25 @@ def test_get_MP_API_images(get_MP_API_images_args):
             image.sol != sol for image in images), f'Incorrect sol was used. {images=}'
 
 
+@pytest.mark.parametrize(
+    'cameras_arg, expected_queries',
+    [
+        # No camera filter
+        (None, {'curiosity': None, 'opportunity': None,
+                'perseverance': None, 'spirit': None}),
+        # Rovers without the camera are skipped and the camera is filtered for upstream
+        ({MarsPhotoAPICameraType.PANCAM}, {
+         'opportunity': 'pancam', 'spirit': 'pancam'}),
+        # Only rovers with exactly one of the cameras have it filtered for upstream
+        ({MarsPhotoAPICameraType.FHAZ, MarsPhotoAPICameraType.MAHLI}, {
+         'curiosity': None, 'opportunity': 'fhaz', 'spirit': 'fhaz'})
+    ]
+)
+def test_plan_MP_API_queries(cameras_arg, expected_queries):
+    queries = plan_MP_API_queries(MarsPhotoAPIRoverType.get_rovers(), cameras_arg)
+    assert {query.rover: query.camera for query in queries} == expected_queries
+
+
 @pytest.mark.parametrize(
     'rovers_arg, manifest_arg, earth_date_arg, sol_arg',
     [
@@ -169,8 +192,8 @@ def test_get_MP_API_images(get_MP_API_images_args):
 )
 def test_get_MP_API_metadata(get_MP_API_metadata_args):
     # Verify function can call API and return metadata
-    metadata_list = get_MP_API_metadata(
-        **get_MP_API_metadata_args)
+    metadata_list = run_async(get_MP_API_metadata(
+        **get_MP_API_metadata_args))
     rovers, manifest, earth_date, sol = get_MP_API_metadata_args.values()
     # Verify correct rover type is used
     assert not any(
@@ -189,3 +212,119 @@ def test_get_MP_API_metadata(get_MP_API_metadata_args):
         else:
             for metadata in metadata_list:
                 assert metadata.manifests, f'Manifest must be a non-empty deque. {metadata=}'
+
+
+@patch('src.apis.get_imagery.request_get_json_cached')
+def test_refresh_rover_status(mock_MP_API):
+    mock_MP_API.return_value = {'rover': {
+        'max_sol': 1000, 'max_date': '2025-01-01', 'total_photos': 10}}
+    previous_status = run_async(get_rover_status())
+    run_async(refresh_rover_status())
+    rover_status = run_async(get_rover_status())
+
+    # Verify a new snapshot was swapped in without mutating the previous one
+    assert rover_status is not previous_status
+    for rover in MarsPhotoAPIRoverType.get_active_rovers():
+        assert rover_status[rover].current_sol == 1000
+        assert rover_status[rover] is not previous_status[rover]
+    for rover in MarsPhotoAPIRoverType.get_inactive_rovers():
+        assert rover_status[rover] is MARS_PHOTO_API_ROVERS[rover]
+    # Verify metadata is read from the snapshot without requesting rovers
+    mock_MP_API.reset_mock()
+    metadata_list = run_async(get_MP_API_metadata(
+        {MarsPhotoAPIRoverType.CURIOSITY}, False, None, None))
+    assert metadata_list[0].rover.total_photos == 10
+    mock_MP_API.assert_not_called()
+
+
+@patch('src.apis.get_imagery.request_get_json_cached')
+def test_get_MP_API_metadata_concurrent(mock_MP_API):
+    mock_MP_API.return_value = {'rover': {
+        'max_sol': 1000, 'max_date': '2025-01-01', 'total_photos': 10}}
+    rovers = {MarsPhotoAPIRoverType.SPIRIT, MarsPhotoAPIRoverType.CURIOSITY}
+    started = []
+
+    async def _get_manifest_index(rover: MarsPhotoAPIRoverType) -> ManifestIndex:
+        started.append(rover)
+        await asyncio.sleep(0)
+        # Verify every rover's manifest is fetched before the first one is awaited
+        assert set(started) == rovers
+        return ManifestIndex.from_photo_manifest({'photos': [
+            {'sol': 1, 'earth_date': '2004-01-05', 'total_photos': 1, 'cameras': ['NAVCAM']}]})
+
+    with patch('src.apis.get_imagery._get_manifest_index', side_effect=_get_manifest_index):
+        metadata_list = run_async(get_MP_API_metadata(rovers, True, None, None))
+    # Verify rovers are yielded in a stable order, however the set iterates
+    assert [metadata.rover.name for metadata in metadata_list] == ['Curiosity', 'Spirit']
+    assert all(len(metadata.manifests) == 1 for metadata in metadata_list)
+
+
+def _EPIC_item(date: str, image: str) -> dict[str, Any]:
+    coordinate = {'x': 0, 'y': 0, 'z': 0}
+    return {'date': date, 'image': image,
+            'centroid_coordinates': {'lat': 0, 'lon': 0},
+            'dscovr_j2000_position': coordinate,
+            'lunar_j2000_position': coordinate,
+            'sun_j2000_position': coordinate,
+            'attitude_quaternions': {'q0': 0, 'q1': 0, 'q2': 0, 'q3': 0}}
+
+
+@patch('src.apis.get_imagery.request_get_json_cached')
+def test_get_EPIC_API_images_snapshot(mock_EPIC_API, get_EPIC_API_images_args):
+    responses = {
+        'https://epic.gsfc.nasa.gov/api/natural/available': ['2025-05-17', '2025-05-18'],
+        'https://epic.gsfc.nasa.gov/api/natural': [_EPIC_item('2025-05-18 00:00:00', 'a'), _EPIC_item('2025-05-18 01:00:00', 'b')],
+        'https://epic.gsfc.nasa.gov/api/natural/date/2025-05-17': [_EPIC_item('2025-05-17 00:00:00', 'c')]
+    }
+    mock_EPIC_API.side_effect = lambda url, **kwargs: responses[url]
+
+    # Verify the latest image is read from the snapshot after the first request
+    images = run_async(get_EPIC_API_images(**get_EPIC_API_images_args))
+    image_type = get_EPIC_API_images_args['image_type']
+    assert [image.image.rsplit('/', 1)[-1] for image in images] == [f'b.{image_type}']
+    mock_EPIC_API.reset_mock()
+    get_EPIC_API_images_args['series'] = True
+    images = run_async(get_EPIC_API_images(**get_EPIC_API_images_args))
+    assert len(images) == 2
+    mock_EPIC_API.assert_not_called()
+
+    # Verify past days are requested without refreshing and unavailable days aren't requested
+    get_EPIC_API_images_args['image_date'] = date(2025, 5, 17)
+    assert len(run_async(get_EPIC_API_images(**get_EPIC_API_images_args))) == 1
+    mock_EPIC_API.assert_called_once_with(
+        'https://epic.gsfc.nasa.gov/api/natural/date/2025-05-17', max_age=None, cache=True)
+    get_EPIC_API_images_args['image_date'] = date(2025, 5, 16)
+    assert not run_async(get_EPIC_API_images(**get_EPIC_API_images_args))
+    mock_EPIC_API.assert_called_once()
+
+
+@patch('src.apis.get_imagery.request_get_json_cached')
+def test_get_EPIC_API_images_date_range(mock_EPIC_API, get_EPIC_API_images_args):
+    days = ['2025-05-15', '2025-05-16', '2025-05-17', '2025-05-18']
+    responses = {
+        'https://epic.gsfc.nasa.gov/api/natural/available': days,
+        'https://epic.gsfc.nasa.gov/api/natural': [_EPIC_item('2025-05-18 00:00:00', '18')]
+    }
+    for day in days:
+        responses[f'https://epic.gsfc.nasa.gov/api/natural/date/{day}'] = [
+            _EPIC_item(f'{day} 00:00:00', day[-2:] + 'a'), _EPIC_item(f'{day} 01:00:00', day[-2:] + 'b')]
+
+    async def _get(url, **kwargs):
+        # Finish later days first to verify images are still returned in order
+        await asyncio.sleep(0.01 * (30 - int(url[-2:])) if '/date/' in url else 0)
+        return responses[url]
+    mock_EPIC_API.side_effect = _get
+
+    get_EPIC_API_images_args.update(series=True, start_date=date(2025, 5, 14),
+                                    end_date=date(2025, 5, 17))
+    images = run_async(get_EPIC_API_images(**get_EPIC_API_images_args))
+    assert [image.image.rsplit('/', 1)[-1].split('.')[0] for image in images] == [
+        '15a', '15b', '16a', '16b', '17a', '17b']
+    timestamps = [image.timestamp for image in images]
+    assert timestamps == sorted(timestamps)
+
+    # Verify only the latest image of each day is returned if not a series
+    get_EPIC_API_images_args.update(series=False, end_date=date(2025, 5, 18))
+    images = run_async(get_EPIC_API_images(**get_EPIC_API_images_args))
+    assert [image.image.rsplit('/', 1)[-1].split('.')[0] for image in images] == [
+        '15b', '16b', '17b', '18']
@@ -1,10 +1,16 @@
+import asyncio
 from contextlib import ExitStack
 from dataclasses import asdict, dataclass
 import pytest
 from unittest.mock import patch
-import requests
 from pytest import Mark, MarkDecorator, FixtureRequest
-from typing import Any, ClassVar, Collection, NamedTuple
+from typing import Any, ClassVar, Collection, Coroutine, NamedTuple
+from src.client import http_client_lifespan
+import os
+
+# Keep tests from writing to the local article database and upstream cache
+os.environ['ARTICLE_DB_PATH'] = ':memory:'
+os.environ['CACHE_BACKEND'] = 'memory'
 
 
 class MockFunction(NamedTuple):
@@ -38,6 +44,14 @@ def _create_parameter_set_list(tests: list[TestCase]):
     return [test.to_parameter_set() for test in tests]
 
 
+def run_async(coro: Coroutine):
+    '''Runs a coroutine to completion with the shared HTTP client pool open.'''
+    async def _run():
+        async with http_client_lifespan():
+            return await coro
+    return asyncio.run(_run())
+
+
 def setup_pytest_generate_tests(metafunc: pytest.Metafunc, config: dict[str, tuple | list[TestCase] | list[str]]):
     '''Setup for the hook function for pytest to dynamically parameterize tests.'''
     if config:
@@ -70,14 +84,6 @@ def mock_fns(request: FixtureRequest):
         yield mocks
 
 
-@pytest.fixture
-def mock_get_exception():
-    with patch('requests.get') as mock:
-        mock.return_value.raise_for_status.side_effect = requests.HTTPError(
-            "Internal Server Error")
-        yield
-
-
 @pytest.fixture
 def mock_request_get_json_cached():
     with patch('src.helpers.request_get_json_cached') as mock:
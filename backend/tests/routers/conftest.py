@@ -1,7 +1,11 @@
 from dataclasses import dataclass
+from datetime import date, timedelta
 from typing import Any, ClassVar, Collection
 from src.models import MarsPhotoAPIRoverType
 from main import app
+from src.routers.imagery import EPIC_MAX_RANGE_DAYS
+from src.apis.get_articles import ARTICLE_STORE, _SOURCE_TIMINGS
+from src.response_cache import RESPONSE_CACHE
 from tests.conftest import MockFunction, TestCase, setup_pytest_generate_tests
 from fastapi import status
 from fastapi.testclient import TestClient
@@ -35,7 +39,8 @@ class RouterTestCase(TestCase):
 _ROUTERS_PATH = 'src.routers.'
 
 _GET_SPACE_NEWS_MOCK_FN_TARGET = f'{_ROUTERS_PATH}news.get_all_articles'
-_GET_SPACE_NEWS_MOCK_FN = MockFunction(target=_GET_SPACE_NEWS_MOCK_FN_TARGET)
+_GET_SPACE_NEWS_MOCK_FN = MockFunction(
+    target=_GET_SPACE_NEWS_MOCK_FN_TARGET, return_value=[])
 _GET_SPACE_NEWS_TESTS = [
     RouterTestCase(label='Default arguments',
                    mock_fns=_GET_SPACE_NEWS_MOCK_FN),
@@ -51,6 +56,13 @@ _GET_SPACE_NEWS_TESTS = [
                    params={'limit': -1},
                    mock_fns=_GET_SPACE_NEWS_MOCK_FN,
                    is_invalid=True),
+    RouterTestCase(label='Cursor',
+                   params={'cursor': 'WzEuNSwiaHR0cHM6Ly9leGFtcGxlLmNvbS8iXQ=='},
+                   mock_fns=_GET_SPACE_NEWS_MOCK_FN),
+    RouterTestCase(label='Invalid cursor',
+                   params={'cursor': 'invalid'},
+                   mock_fns=_GET_SPACE_NEWS_MOCK_FN,
+                   is_invalid=True),
     RouterTestCase(label='Default failure',
                    mock_fns=MockFunction(
                        target=_GET_SPACE_NEWS_MOCK_FN_TARGET, side_effect=Exception()),
@@ -59,7 +71,7 @@ _GET_SPACE_NEWS_TESTS = [
 
 _GET_SPACE_INDUSTRY_NEWS_MOCK_FN_TARGET = f'{_ROUTERS_PATH}news.get_industry_articles'
 _GET_SPACE_INDUSTRY_NEWS_MOCK_FN = MockFunction(
-    target=_GET_SPACE_INDUSTRY_NEWS_MOCK_FN_TARGET)
+    target=_GET_SPACE_INDUSTRY_NEWS_MOCK_FN_TARGET, return_value=[])
 _GET_SPACE_INDUSTRY_NEWS_TESTS = [
     RouterTestCase(label='Default arguments',
                    mock_fns=_GET_SPACE_INDUSTRY_NEWS_MOCK_FN),
@@ -75,6 +87,13 @@ _GET_SPACE_INDUSTRY_NEWS_TESTS = [
                    params={'limit': -1},
                    mock_fns=_GET_SPACE_INDUSTRY_NEWS_MOCK_FN,
                    is_invalid=True),
+    RouterTestCase(label='Cursor',
+                   params={'cursor': 'WzEuNSwiaHR0cHM6Ly9leGFtcGxlLmNvbS8iXQ=='},
+                   mock_fns=_GET_SPACE_INDUSTRY_NEWS_MOCK_FN),
+    RouterTestCase(label='Invalid cursor',
+                   params={'cursor': 'invalid'},
+                   mock_fns=_GET_SPACE_INDUSTRY_NEWS_MOCK_FN,
+                   is_invalid=True),
     RouterTestCase(label='Default failure',
                    mock_fns=MockFunction(
                        target=_GET_SPACE_INDUSTRY_NEWS_MOCK_FN_TARGET, side_effect=Exception()),
@@ -83,7 +102,7 @@ _GET_SPACE_INDUSTRY_NEWS_TESTS = [
 
 _GET_SPACE_SCIENCE_NEWS_MOCK_FN_TARGET = f'{_ROUTERS_PATH}news.get_science_articles'
 _GET_SPACE_SCIENCE_NEWS_MOCK_FN = MockFunction(
-    target=_GET_SPACE_SCIENCE_NEWS_MOCK_FN_TARGET)
+    target=_GET_SPACE_SCIENCE_NEWS_MOCK_FN_TARGET, return_value=[])
 _GET_SPACE_SCIENCE_NEWS_TESTS = [
     RouterTestCase(label='Default arguments',
                    mock_fns=_GET_SPACE_SCIENCE_NEWS_MOCK_FN),
@@ -99,6 +118,13 @@ _GET_SPACE_SCIENCE_NEWS_TESTS = [
                    params={'limit': -1},
                    mock_fns=_GET_SPACE_SCIENCE_NEWS_MOCK_FN,
                    is_invalid=True),
+    RouterTestCase(label='Cursor',
+                   params={'cursor': 'WzEuNSwiaHR0cHM6Ly9leGFtcGxlLmNvbS8iXQ=='},
+                   mock_fns=_GET_SPACE_SCIENCE_NEWS_MOCK_FN),
+    RouterTestCase(label='Invalid cursor',
+                   params={'cursor': 'invalid'},
+                   mock_fns=_GET_SPACE_SCIENCE_NEWS_MOCK_FN,
+                   is_invalid=True),
     RouterTestCase(label='Default failure',
                    mock_fns=MockFunction(
                        target=_GET_SPACE_SCIENCE_NEWS_MOCK_FN_TARGET, side_effect=Exception()),
@@ -106,7 +132,8 @@ _GET_SPACE_SCIENCE_NEWS_TESTS = [
 ]
 
 _GET_EPIC_API_MOCK_FN_TARGET = f'{_ROUTERS_PATH}imagery.get_EPIC_API_images'
-_GET_EPIC_API_MOCK_FN = MockFunction(target=_GET_EPIC_API_MOCK_FN_TARGET)
+_GET_EPIC_API_MOCK_FN = MockFunction(
+    target=_GET_EPIC_API_MOCK_FN_TARGET, return_value=[])
 _GET_EPIC_API_TESTS = [
     RouterTestCase(label='Default arguments',
                    mock_fns=_GET_EPIC_API_MOCK_FN),
@@ -126,6 +153,33 @@ _GET_EPIC_API_TESTS = [
                    params={'date': '2019 12 1'},
                    mock_fns=_GET_EPIC_API_MOCK_FN,
                    is_invalid=True),
+    RouterTestCase(label='Valid date range',
+                   params={'start_date': '2019-12-01',
+                           'end_date': '2019-12-07'},
+                   mock_fns=_GET_EPIC_API_MOCK_FN),
+    RouterTestCase(label='Invalid date range: end_date is required',
+                   params={'start_date': '2019-12-01'},
+                   mock_fns=_GET_EPIC_API_MOCK_FN,
+                   is_invalid=True),
+    RouterTestCase(label='Invalid date range: start_date <= end_date constraint',
+                   params={'start_date': '2019-12-07',
+                           'end_date': '2019-12-01'},
+                   mock_fns=_GET_EPIC_API_MOCK_FN,
+                   is_invalid=True),
+    RouterTestCase(label=f'Valid date range: end_date {EPIC_MAX_RANGE_DAYS} days after start_date',
+                   params={'start_date': '2019-12-01',
+                           'end_date': (date(2019, 12, 1) + timedelta(days=EPIC_MAX_RANGE_DAYS)).isoformat()},
+                   mock_fns=_GET_EPIC_API_MOCK_FN),
+    RouterTestCase(label=f'Invalid date range: end_date {EPIC_MAX_RANGE_DAYS + 1} days after start_date',
+                   params={'start_date': '2019-12-01',
+                           'end_date': (date(2019, 12, 1) + timedelta(days=EPIC_MAX_RANGE_DAYS + 1)).isoformat()},
+                   mock_fns=_GET_EPIC_API_MOCK_FN,
+                   is_invalid=True),
+    RouterTestCase(label='Invalid date range: span constraint',
+                   params={'start_date': '2019-01-01',
+                           'end_date': '2019-12-31'},
+                   mock_fns=_GET_EPIC_API_MOCK_FN,
+                   is_invalid=True),
     RouterTestCase(label='Default failure',
                    mock_fns=MockFunction(
                        target=_GET_EPIC_API_MOCK_FN_TARGET, side_effect=Exception()),
@@ -134,7 +188,7 @@ _GET_EPIC_API_TESTS = [
 
 _GET_MARS_PHOTO_API_MOCK_FN_TARGET = f'{_ROUTERS_PATH}imagery.get_MP_API_images'
 _GET_MARS_PHOTO_API_MOCK_FN = MockFunction(
-    target=_GET_MARS_PHOTO_API_MOCK_FN_TARGET)
+    target=_GET_MARS_PHOTO_API_MOCK_FN_TARGET, return_value=[])
 _GET_MARS_PHOTO_API_TESTS = [
     RouterTestCase(label='Default arguments',
                    params={'rovers': MarsPhotoAPIRoverType.CURIOSITY},
@@ -167,7 +221,7 @@ _GET_MARS_PHOTO_API_TESTS = [
 
 _GET_MARS_PHOTO_API_METADATA_MOCK_FN_TARGET = f'{_ROUTERS_PATH}imagery.get_MP_API_metadata'
 _GET_MARS_PHOTO_API_METADATA_MOCK_FN = MockFunction(
-    target=_GET_MARS_PHOTO_API_METADATA_MOCK_FN_TARGET)
+    target=_GET_MARS_PHOTO_API_METADATA_MOCK_FN_TARGET, return_value=[])
 _GET_MARS_PHOTO_API_METADATA_TESTS = [
     RouterTestCase(label='Default arguments',
                    mock_fns=_GET_MARS_PHOTO_API_METADATA_MOCK_FN),
@@ -191,6 +245,10 @@ _GET_MARS_PHOTO_API_METADATA_TESTS = [
                    params={'sol': -1},
                    mock_fns=_GET_MARS_PHOTO_API_METADATA_MOCK_FN,
                    is_invalid=True),
+    RouterTestCase(label='Invalid sol_from: sol_from >= 0 constraint',
+                   params={'sol_from': -1},
+                   mock_fns=_GET_MARS_PHOTO_API_METADATA_MOCK_FN,
+                   is_invalid=True),
     RouterTestCase(label='Default failure',
                    mock_fns=MockFunction(
                        target=_GET_MARS_PHOTO_API_METADATA_MOCK_FN_TARGET, side_effect=Exception()),
@@ -234,6 +292,28 @@ _TEST_CONFIGS = {
 }
 
 
+@pytest.fixture(autouse=True)
+def clear_response_cache():
+    '''Fixture that clears cached responses, so each test calls its mocked functions.'''
+    RESPONSE_CACHE.clear()
+    yield
+
+
+@pytest.fixture(autouse=True)
+def reset_article_store():
+    '''Fixture that starts every test with an empty, never polled article store.'''
+    ARTICLE_STORE.clear()
+    _SOURCE_TIMINGS.clear()
+    yield
+
+
+@pytest.fixture(autouse=True)
+def reset_rate_limits():
+    '''Fixture that resets rate limits, so tests aren't throttled by earlier ones.'''
+    app.state.limiter.reset()
+    yield
+
+
 @pytest.fixture(scope='package')
 def test_client():
     '''Fixture for `TestClient`.'''
@@ -1,5 +1,11 @@
+import json
 from typing import Any
+from unittest.mock import patch
+from fastapi import status
 from fastapi.testclient import TestClient
+import pytest
+from src.models import MarsPhotoAPICamera, MarsPhotoAPIImage
+from src.streaming import NDJSON_MEDIA_TYPE
 
 _ROUTE = 'imagery'
 
@@ -20,3 +26,34 @@ def test_get_mars_photo_API_metadata(mock_fns, params: dict[str, Any] | None, ex
     url = f'{_ROUTE}/mars-photo/meta'
     response = test_client.get(url, params=params)
     assert response.status_code == expected_status_code, response.text
+
+
+async def _iter_items(*items):
+    for item in items:
+        if isinstance(item, Exception):
+            raise item
+        yield item
+
+
+@pytest.mark.parametrize('params, headers', [
+    ({'format': 'ndjson'}, None),
+    (None, {'Accept': NDJSON_MEDIA_TYPE})
+])
+def test_get_mars_photo_API_ndjson(params: dict[str, Any] | None, headers: dict[str, str] | None, test_client: TestClient):
+    camera = MarsPhotoAPICamera.get('NAVCAM')
+    images = [MarsPhotoAPIImage(rover_name='Spirit', camera=camera, image=f'{i}.jpg', earth_date='2004-01-05', sol=1)
+              for i in range(2)]
+    with patch('src.routers.imagery.iter_MP_API_images', side_effect=lambda *args: _iter_items(*images)):
+        response = test_client.get(f'{_ROUTE}/mars-photo', params=params, headers=headers)
+    assert response.status_code == status.HTTP_200_OK, response.text
+    assert response.headers['Content-Type'] == NDJSON_MEDIA_TYPE
+    # Verify the stream isn't buffered by gzip
+    assert 'Content-Encoding' not in response.headers
+    assert [json.loads(line)['image'] for line in response.text.splitlines()] == ['0.jpg', '1.jpg']
+
+
+def test_get_EPIC_API_ndjson_failure(test_client: TestClient):
+    # Errors before the first item still fail the request
+    with patch('src.routers.imagery.iter_EPIC_API_images', side_effect=lambda *args: _iter_items(Exception())):
+        response = test_client.get(f'{_ROUTE}/epic', params={'format': 'ndjson'})
+    assert response.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
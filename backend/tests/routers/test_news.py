@@ -1,5 +1,13 @@
+from datetime import datetime, UTC
 from typing import Any
+from unittest.mock import patch
+from fastapi import status
 from fastapi.testclient import TestClient
+import pytest
+from src.apis.get_articles import PHYSORG_FEEDS, PHYSORG_SOURCE, NewsBatch, poll_news_source
+from src.models import Article
+from src.response_cache import RESPONSE_CACHE
+from tests.conftest import run_async
 
 _ROUTE = 'news'
 
@@ -20,3 +28,51 @@ def test_get_space_science_news(mock_fns, params: dict[str, Any] | None, expecte
     url = f'{_ROUTE}/science'
     response = test_client.get(url, params=params)
     assert response.status_code == expected_status_code, response.text
+
+
+@patch('src.routers.news.get_all_articles', return_value=[])
+def test_get_space_news_not_modified(mock_get_all_articles, test_client: TestClient):
+    response = test_client.get(_ROUTE, headers={'Accept-Encoding': 'gzip'})
+    etag = response.headers['ETag']
+
+    # Verify an unchanged response isn't sent again, compressed or not
+    for accept_encoding in ('gzip', 'identity'):
+        response = test_client.get(_ROUTE, headers={'If-None-Match': etag, 'Accept-Encoding': accept_encoding})
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert response.headers['ETag'] == etag
+        assert 'max-age' in response.headers['Cache-Control']
+
+
+def _server_timing_names(response) -> list[str]:
+    entries = [entry.strip() for entry in response.headers['Server-Timing'].split(',')]
+    assert all(';dur=' in entry for entry in entries), entries
+    return [entry.split(';')[0] for entry in entries]
+
+
+def test_get_space_news_server_timing(test_client: TestClient):
+    now = datetime.now(UTC).timestamp()
+    failing_feeds = set()
+
+    async def _get_feed_articles(url, earliest_datetime):
+        if url in failing_feeds:
+            raise RuntimeError('feed down')
+        article = Article('title', 'content', 'phys.org', '', url, now, 'Astronomy')
+        return NewsBatch(articles={url: article})
+
+    snapi_article = Article('title', 'content', 'author', '', 'https://example.com/', now, 'Test')
+    with patch('src.apis.get_articles.get_SNAPI_articles', return_value=[snapi_article]), \
+            patch('src.apis.get_articles.get_physorg_feed_articles', side_effect=_get_feed_articles):
+        # Verify every feed's fetch duration is reported
+        response = test_client.get(_ROUTE)
+        assert response.status_code == status.HTTP_200_OK, response.text
+        assert sorted(_server_timing_names(response)) == sorted(['snapi', *PHYSORG_FEEDS])
+
+        # Verify a failed poll doesn't leave the previous poll's durations behind
+        failing_feeds.add(PHYSORG_FEEDS['physorg_astronomy'])
+        with pytest.raises(ExceptionGroup):
+            run_async(poll_news_source(PHYSORG_SOURCE))
+        RESPONSE_CACHE.clear()
+        response = test_client.get(_ROUTE)
+    assert response.status_code == status.HTTP_200_OK, response.text
+    assert _server_timing_names(response) == ['snapi']
+    assert len(response.json()) == 1 + len(PHYSORG_FEEDS)
@@ -0,0 +1,89 @@
+from datetime import timedelta
+from unittest.mock import patch
+from time import time
+import pytest
+from requests_cache import DO_NOT_CACHE, NEVER_EXPIRE
+from src.cache import UpstreamCache
+from src.cache_config import CacheBackendType, CacheConfig
+
+
+@pytest.mark.parametrize('backend', list(CacheBackendType))
+def test_cache_config_backends(backend, tmp_path):
+    config = CacheConfig(backend=backend, cache_name=str(tmp_path / 'cache'))
+    cache = UpstreamCache(config.create_backend())
+    key = 'https://example.com/path?a=1'
+    cache.set(key, {'data': [1, 2]})
+    assert cache.get(key) == {'data': (1, 2)}
+    assert cache.get('https://example.com/other') is None
+
+
+def test_cache_config_from_env():
+    with patch.dict('os.environ', {'CACHE_BACKEND': 'filesystem', 'CACHE_EXPIRE_AFTER': '60'}):
+        config = CacheConfig.from_env()
+    assert config.backend == CacheBackendType.FILESYSTEM
+    assert config.expire_after == 60
+
+
+def test_cache_config_memory_maxsize():
+    backend = CacheConfig(backend=CacheBackendType.MEMORY, memory_maxsize=2).create_backend()
+    cache = UpstreamCache(backend, l1_maxsize=0)
+    for path in ('a', 'b', 'c'):
+        cache.set(f'https://example.com/{path}', path)
+    # Verify the in-memory backend is bounded, evicting the least recently used response
+    assert len(backend) == 2
+    assert cache.get('https://example.com/a') is None
+    assert cache.get('https://example.com/c') == 'c'
+
+
+def test_upstream_cache_expiration():
+    cache = UpstreamCache({}, expire_after=timedelta(minutes=1),
+                          urls_expire_after={'example.com/never': NEVER_EXPIRE, 'example.com/skip': DO_NOT_CACHE})
+    for path in ('default', 'never', 'skip'):
+        cache.set(f'https://example.com/{path}', path)
+    assert cache.get('https://example.com/skip') is None
+
+    # Verify only the default rule expired an hour later
+    with patch('src.cache.time', return_value=time() + 60 * 60):
+        assert cache.get('https://example.com/default') is None
+        assert cache.get('https://example.com/never') == 'never'
+
+
+def test_upstream_cache_levels():
+    backend = {}
+    cache = UpstreamCache(backend, l1_maxsize=1)
+    cache.set('https://example.com/a', 'a')
+    cache.set('https://example.com/b', 'b')
+
+    # Verify the least recently used entry was evicted from L1 but is still served from L2
+    assert cache.get('https://example.com/a') == 'a'
+    assert cache.get('https://example.com/a') == 'a'
+    assert len(backend) == 2
+    assert (cache.stats.l1_hits, cache.stats.l1_misses, cache.stats.l2_hits) == (1, 1, 1)
+
+    # Verify another process's cache shares L2
+    other_cache = UpstreamCache(backend)
+    assert other_cache.get('https://example.com/b') == 'b'
+    assert other_cache.stats.l2_hits == 1
+
+
+def test_upstream_cache_max_age():
+    cache = UpstreamCache({})
+    cache.set('https://example.com/a', 'a')
+    with patch('src.cache.time', return_value=time() + 60):
+        assert cache.get('https://example.com/a', max_age=30) is None
+        assert cache.get('https://example.com/a', max_age=120) == 'a'
+    assert cache.stats.l2_misses == 1
+
+
+def test_upstream_cache_read_only():
+    backend = {}
+    cache = UpstreamCache(backend)
+    data = {'results': [{'title': 'a'}]}
+    assert cache.set('https://example.com/a', data) == {'results': ({'title': 'a'},)}
+
+    # Verify content served from either level can't be mutated, and the caller's copy isn't shared
+    data['results'].append({'title': 'b'})
+    for content in (cache.get('https://example.com/a'), UpstreamCache(backend).get('https://example.com/a')):
+        assert content == {'results': ({'title': 'a'},)}
+        with pytest.raises(TypeError):
+            content['results'][0]['title'] = 'b'
@@ -0,0 +1,59 @@
+import asyncio
+import httpx
+from unittest.mock import MagicMock, patch
+from src.cache import UpstreamCache
+from src.helpers import request_get_json_cached
+
+
+def test_request_get_json_cached_single_flight():
+    calls = []
+
+    async def get(url, params=None, **kwargs):
+        calls.append(url)
+        await asyncio.sleep(0.01)
+        return httpx.Response(200, json={'ok': True}, request=httpx.Request('GET', url))
+
+    pool = MagicMock(get=get)
+    cache = UpstreamCache({})
+
+    async def _test():
+        return await asyncio.gather(*(request_get_json_cached('https://example.com', params={'a': 1}) for _ in range(5)))
+
+    with patch('src.helpers.get_http_client_pool', return_value=pool), patch('src.helpers.get_upstream_cache', return_value=cache):
+        results = asyncio.run(_test())
+
+        # Verify concurrent callers share one upstream request and its result
+        assert results == [{'ok': True}] * 5
+        assert len(calls) == 1
+        assert asyncio.run(request_get_json_cached(
+            'https://example.com', params={'a': 1})) == {'ok': True}
+        assert len(calls) == 1
+
+
+def test_request_get_json_cached_single_flight_error():
+    async def get(url, params=None, **kwargs):
+        await asyncio.sleep(0.01)
+        return httpx.Response(500, request=httpx.Request('GET', url))
+
+    pool = MagicMock(get=get)
+
+    async def _test():
+        return await asyncio.gather(*(request_get_json_cached('https://example.com', exception_handler=lambda e: 'handled') for _ in range(3)))
+
+    # Verify each caller handles the shared error
+    with patch('src.helpers.get_http_client_pool', return_value=pool), patch('src.helpers.get_upstream_cache', return_value=UpstreamCache({})):
+        assert asyncio.run(_test()) == ['handled'] * 3
+
+
+def test_request_get_json_cached_uncached():
+    async def get(url, params=None, **kwargs):
+        return httpx.Response(200, json=[{'image': 'partial'}], request=httpx.Request('GET', url))
+
+    pool = MagicMock(get=get)
+    cache = UpstreamCache({})
+    url = 'https://epic.gsfc.nasa.gov/api/natural/date/2025-01-02'
+
+    # Verify a refreshed response isn't cached, so it can't be served later under the long archive expiration
+    with patch('src.helpers.get_http_client_pool', return_value=pool), patch('src.helpers.get_upstream_cache', return_value=cache):
+        assert asyncio.run(request_get_json_cached(url, max_age=0, cache=False)) == ({'image': 'partial'},)
+    assert cache.get(url) is None
@@ -0,0 +1,63 @@
+from datetime import date
+from unittest.mock import AsyncMock
+import pytest
+from src.manifest_index import ManifestIndex, ManifestIndexCache
+from src.models import MARS_PHOTO_API_ROVERS, MarsPhotoAPICamera
+from tests.conftest import run_async
+
+_PHOTO_MANIFEST = {
+    'photos': [
+        {'sol': 2, 'earth_date': '2004-01-06',
+            'total_photos': 5, 'cameras': ['NAVCAM']},
+        {'sol': 0, 'earth_date': '2004-01-04',
+            'total_photos': 3, 'cameras': ['ENTRY', 'NAVCAM']},
+        {'sol': 5, 'earth_date': '2004-01-09',
+            'total_photos': 1, 'cameras': ['PANCAM']},
+    ]
+}
+
+
+@pytest.mark.parametrize(
+    'kwargs, expected_sols',
+    [
+        # All manifests, sorted by sol
+        ({}, [0, 2, 5]),
+        ({'sol': 2}, [2]),
+        ({'sol': 3}, []),
+        ({'earth_date': date(2004, 1, 9)}, [5]),
+        ({'sol_from': 1, 'sol_to': 5}, [2, 5]),
+        ({'sol_to': 2}, [0, 2]),
+        ({'sol_from': 6}, []),
+        # earth_date takes precedence
+        ({'earth_date': date(2004, 1, 4), 'sol': 5}, [0])
+    ]
+)
+def test_manifest_index_find(kwargs, expected_sols):
+    index = ManifestIndex.from_photo_manifest(_PHOTO_MANIFEST)
+    assert [manifest.sol for manifest in index.find(**kwargs)] == expected_sols
+
+
+def test_manifest_index_shares_cameras():
+    index = ManifestIndex.from_photo_manifest(_PHOTO_MANIFEST)
+    assert index.by_sol[0].cameras[1] is index.by_sol[2].cameras[0]
+    # Verify rovers share the same camera objects
+    assert index.by_sol[0].cameras[1] is MarsPhotoAPICamera.get('NAVCAM')
+    assert any(camera is MarsPhotoAPICamera.get('NAVCAM')
+               for camera in MARS_PHOTO_API_ROVERS['spirit'].cameras)
+    assert index.by_sol[0].cameras[0].name == 'Entry, Descent, and Landing Camera'
+
+
+def test_manifest_index_cache():
+    cache = ManifestIndexCache(refresh_interval=60)
+    fetch = AsyncMock(return_value={'photo_manifest': _PHOTO_MANIFEST})
+
+    # Verify the manifest is fetched once until the index expires
+    index = run_async(cache.get('spirit', fetch))
+    assert run_async(cache.get('spirit', fetch)) is index
+    assert fetch.await_count == 1
+
+    # Verify the expired index is served if a rebuild fails
+    cache.refresh_interval = 0
+    fetch.side_effect = Exception()
+    assert run_async(cache.get('spirit', fetch)) is index
+    assert fetch.await_count == 2
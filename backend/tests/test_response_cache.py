@@ -0,0 +1,132 @@
+import asyncio
+from collections import deque
+import json
+from unittest.mock import patch
+from fastapi.encoders import jsonable_encoder
+from src.models import Article, MARS_PHOTO_API_ROVERS, MarsPhotoAPICamera, MarsPhotoAPIImage, MarsPhotoAPIMetadata, MarsPhotoAPIMetadataManifest, MarsPhotoAPIRover
+from src.response_cache import CachePolicy, CachedResponse, ResponseCache, create_route_key, encode_json
+from tests.conftest import run_async
+
+
+def test_create_route_key():
+    # Verify equivalent queries share a key
+    assert create_route_key('route', a={'y', 'x'}, b=1) == create_route_key(
+        'route', b=1, a={'x', 'y'})
+    assert create_route_key('route', a=1) != create_route_key('other', a=1)
+
+
+def test_encode_json():
+    camera = MarsPhotoAPICamera.get('NAVCAM')
+    content = deque([
+        Article('title', 'content', 'author', 'image', 'url', 1.5, 'category'),
+        MarsPhotoAPIImage(rover_name='Spirit', camera=camera, image='image', earth_date='2004-01-05', sol=1),
+        MarsPhotoAPIMetadata(rover=MARS_PHOTO_API_ROVERS['spirit'],
+                             manifests=deque([MarsPhotoAPIMetadataManifest(sol=1, earth_date='2004-01-05', total_photos=2, cameras=[camera])]))
+    ])
+    # Verify the content is encoded like FastAPI would
+    assert json.loads(encode_json(content)) == jsonable_encoder(content)
+
+
+def test_cached_response_etag_stable():
+    # Verify a rover's cameras are encoded in the same order however its camera names iterate
+    rovers = [MarsPhotoAPIRover(name='Spirit', launch_date='2003-06-10', landing_date='2004-01-04', active=False,
+                                camera_names=camera_names)
+              for camera_names in (['pancam', 'fhaz', 'navcam'], ['navcam', 'pancam', 'fhaz'])]
+    assert [camera.short for camera in rovers[0].cameras] == ['FHAZ', 'NAVCAM', 'PANCAM']
+    assert CachedResponse.encode(rovers[0]).etag == CachedResponse.encode(rovers[1]).etag
+
+
+def test_response_cache():
+    cache = ResponseCache()
+    policy = CachePolicy(ttl=60, stale_ttl=60)
+    calls = []
+
+    async def compute():
+        calls.append(None)
+        await asyncio.sleep(0)
+        return CachedResponse.encode({'calls': len(calls)})
+
+    async def _test():
+        # Verify concurrent misses share one computation
+        responses = await asyncio.gather(*(cache.get('key', policy, compute) for _ in range(3)))
+        assert len(calls) == 1
+        assert all(response.headers['X-Cache'] == 'MISS' for response in responses)
+
+        response = await cache.get('key', policy, compute)
+        assert response.headers['X-Cache'] == 'HIT'
+        assert response.body == b'{"calls":1}'
+
+        # Verify a stale response is served while it's refreshed in the background
+        with patch('src.response_cache.monotonic', return_value=cache._entries['key'].created + 90):
+            response = await cache.get('key', policy, compute)
+        assert response.headers['X-Cache'] == 'STALE'
+        assert response.body == b'{"calls":1}'
+        await asyncio.sleep(0.01)
+        assert len(calls) == 2
+
+    run_async(_test())
+
+
+def test_response_cache_refresh_failure():
+    cache = ResponseCache()
+    policy = CachePolicy(ttl=60, stale_ttl=60)
+
+    async def compute():
+        await asyncio.sleep(0.01)
+        if cache._entries:
+            raise RuntimeError('upstream down')
+        return CachedResponse.encode([])
+
+    async def _test():
+        await cache.get('key', policy, compute)
+        with patch('src.response_cache.monotonic', return_value=cache._entries['key'].created + 90):
+            responses = [await cache.get('key', policy, compute) for _ in range(3)]
+        await asyncio.sleep(0.05)
+        return responses
+
+    # Verify stale hits during a failed refresh are served, and the failure is reported once
+    with patch('src.response_cache._report_refresh_failure', side_effect=lambda task: task.exception()) as mock_report:
+        responses = run_async(_test())
+    assert all(response.headers['X-Cache'] == 'STALE' for response in responses)
+    mock_report.assert_called_once()
+
+
+def test_response_cache_maxsize():
+    cache = ResponseCache(maxsize=2)
+    policy = CachePolicy(ttl=60)
+
+    async def compute():
+        return CachedResponse.encode([])
+
+    async def _test():
+        for key in ('a', 'b', 'a', 'c'):
+            await cache.get(key, policy, compute)
+
+    # Verify the least recently used key is evicted
+    run_async(_test())
+    assert list(cache._entries) == ['a', 'c']
+
+
+def test_response_cache_conditional():
+    cache = ResponseCache()
+    policy = CachePolicy(ttl=60)
+
+    async def compute():
+        return CachedResponse.encode({'data': 1})
+
+    async def _test():
+        response = await cache.get('key', policy, compute)
+        etag = response.headers['ETag']
+        assert etag.startswith('W/"')
+        assert response.headers['Cache-Control'] == 'public, max-age=59'
+
+        # Verify a matching entity tag is answered without a body
+        for if_none_match in (etag, f'"other", {etag.removeprefix("W/")}', '*'):
+            response = await cache.get('key', policy, compute, if_none_match)
+            assert response.status_code == 304
+            assert response.body == b''
+            assert response.headers['ETag'] == etag
+        response = await cache.get('key', policy, compute, '"other"')
+        assert response.status_code == 200
+
+    run_async(_test())
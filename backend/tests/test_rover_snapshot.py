@@ -0,0 +1,66 @@
+from datetime import date
+from unittest.mock import patch
+import pytest
+from src.apis import get_MP_API_images, get_MP_API_metadata
+from src.apis.get_imagery import SNAPSHOT_MANIFEST_INDEXES
+from src.models import MarsPhotoAPICameraType, MarsPhotoAPIRoverType
+from src.rover_snapshot import RoverSnapshot, write_rover_snapshot
+from tests.conftest import run_async
+
+
+def _photo(id: int, sol: int, earth_date: str, camera: str) -> dict:
+    return {'id': id, 'sol': sol, 'earth_date': earth_date,
+            'camera': {'name': camera, 'full_name': f'{camera} Camera'},
+            'img_src': f'https://example.com/{id}.jpg'}
+
+
+@pytest.fixture
+def snapshot(tmp_path):
+    photo_manifest = {
+        'max_sol': 2,
+        'photos': [
+            {'sol': 1, 'earth_date': '2004-01-05',
+                'total_photos': 2, 'cameras': ['NAVCAM', 'PANCAM']},
+            {'sol': 2, 'earth_date': '2004-01-06',
+                'total_photos': 1, 'cameras': ['PANCAM']},
+        ]
+    }
+    photos = [_photo(1, 1, '2004-01-05', 'NAVCAM'), _photo(2, 1, '2004-01-05', 'PANCAM'),
+              _photo(3, 2, '2004-01-06', 'PANCAM')]
+    path = tmp_path / 'snapshot.sqlite'
+    write_rover_snapshot(path, {MarsPhotoAPIRoverType.SPIRIT: (photo_manifest, photos)})
+    snapshot = RoverSnapshot(path)
+    yield snapshot
+    snapshot.close()
+    SNAPSHOT_MANIFEST_INDEXES.clear()
+
+
+def test_rover_snapshot(snapshot: RoverSnapshot):
+    assert snapshot.has_rover(MarsPhotoAPIRoverType.SPIRIT)
+    assert not snapshot.has_rover(MarsPhotoAPIRoverType.OPPORTUNITY)
+
+    # Verify latest photos are from the final sol
+    assert [image.image for image in snapshot.get_photos(MarsPhotoAPIRoverType.SPIRIT, None, None, None)] == [
+        'https://example.com/3.jpg']
+    # Verify photos are filtered by sol, earth date and cameras
+    assert len(snapshot.get_photos(
+        MarsPhotoAPIRoverType.SPIRIT, None, None, 1)) == 2
+    images = snapshot.get_photos(MarsPhotoAPIRoverType.SPIRIT, {
+                                 MarsPhotoAPICameraType.NAVCAM}, date(2004, 1, 5), None)
+    assert [(image.camera.short, image.rover_name) for image in images] == [('NAVCAM', 'Spirit')]
+
+
+def test_rover_snapshot_missing(tmp_path):
+    snapshot = RoverSnapshot(tmp_path / 'missing.sqlite')
+    assert not snapshot.has_rover(MarsPhotoAPIRoverType.SPIRIT)
+
+
+@patch('src.apis.get_imagery.request_get_json_cached', side_effect=Exception('Network must not be used'))
+def test_get_MP_API_from_snapshot(mock_request_get_json_cached, snapshot: RoverSnapshot):
+    rovers = {MarsPhotoAPIRoverType.SPIRIT}
+    with patch('src.apis.get_imagery.ROVER_SNAPSHOT', snapshot):
+        images = run_async(get_MP_API_images(rovers, None, None, 1))
+        metadata_list = run_async(get_MP_API_metadata(rovers, True, None, 2))
+
+    assert len(images) == 2
+    assert [manifest.sol for manifest in metadata_list[0].manifests] == [2]
@@ -0,0 +1,76 @@
+from datetime import datetime, timedelta, UTC
+from email.utils import format_datetime
+from unittest.mock import patch
+import httpx
+from lxml import etree
+import pytest
+from src.apis.get_articles import PHYSORG_FEEDS, get_physorg_feed_articles
+from src.rss import RSSItem, iter_rss_items
+from tests.conftest import run_async
+
+_NOW = datetime.now(UTC).replace(microsecond=0)
+
+_FEED = f'''<?xml version="1.0" encoding="utf-8"?>
+<rss version="2.0" xmlns:media="http://search.yahoo.com/mrss/">
+    <channel>
+        <title>Astronomy News</title>
+        <item>
+            <title> New galaxy </title>
+            <description>A galaxy was found.</description>
+            <link>https://phys.org/news/galaxy.html</link>
+            <category>Astronomy</category>
+            <pubDate>{format_datetime(_NOW, usegmt=True)}</pubDate>
+            <guid isPermaLink="false">news1</guid>
+            <media:thumbnail url="https://phys.org/galaxy.jpg" />
+        </item>
+        <item>
+            <title>Rover lands</title>
+            <description></description>
+            <link>https://phys.org/news/rover.html</link>
+            <category>Space Exploration</category>
+            <pubDate>{format_datetime(_NOW - timedelta(hours=1), usegmt=True)}</pubDate>
+            <guid isPermaLink="false">news2</guid>
+        </item>
+        <item>
+            <title>Old news</title>
+            <description>Old.</description>
+            <link>https://phys.org/news/old.html</link>
+            <category>Astronomy</category>
+            <pubDate>{format_datetime(_NOW - timedelta(days=60), usegmt=True)}</pubDate>
+            <guid isPermaLink="false">news3</guid>
+        </item>
+    </channel>
+</rss>'''.encode()
+
+
+def test_iter_rss_items():
+    items = list(iter_rss_items(_FEED))
+    assert [item.guid for item in items] == ['news1', 'news2', 'news3']
+    # Verify fields are stripped and the namespaced thumbnail is extracted
+    assert items[0] == RSSItem(guid='news1', title='New galaxy', link='https://phys.org/news/galaxy.html',
+                               description='A galaxy was found.', category='Astronomy',
+                               pub_date=format_datetime(_NOW, usegmt=True), thumbnail='https://phys.org/galaxy.jpg')
+    assert items[1].thumbnail is None
+    assert items[1].description == ''
+
+
+def test_iter_rss_items_incremental():
+    # Verify items are yielded as they are read, before the rest of the document is parsed
+    truncated = _FEED[:_FEED.index(b'<title>Old news')]
+    items = iter_rss_items(truncated)
+    assert [next(items).guid, next(items).guid] == ['news1', 'news2']
+    with pytest.raises(etree.XMLSyntaxError):
+        next(items)
+
+
+@patch('src.apis.get_articles.request_get_conditional')
+def test_get_physorg_feed_articles(mock_request):
+    mock_request.return_value = httpx.Response(200, content=_FEED, headers={'ETag': '"feed"'})
+    feed_url = PHYSORG_FEEDS['physorg_astronomy']
+    batch = run_async(get_physorg_feed_articles(feed_url, _NOW - timedelta(days=30)))
+
+    # Verify 'Space Exploration' items are seen but skipped, and items before the earliest datetime stop the feed
+    assert [article.title for article in batch.articles.values()] == ['New galaxy']
+    assert batch.articles['https://phys.org/news/galaxy.html'].image == 'https://phys.org/galaxy.jpg'
+    assert batch.seen_guids == {'news1', 'news2'}
+    assert batch.feed_validators == {feed_url: ('"feed"', None)}
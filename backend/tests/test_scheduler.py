@@ -0,0 +1,68 @@
+import asyncio
+from src.scheduler import Scheduler
+
+
+def test_scheduler_start_stop():
+    calls = []
+
+    async def job():
+        calls.append(None)
+
+    async def _test():
+        scheduler = Scheduler()
+        scheduler.add_job('job', job, 60)
+        scheduler.start()
+        # Verify jobs run immediately once started
+        await asyncio.sleep(0)
+        assert len(calls) == 1
+        tasks = scheduler._tasks
+        # Verify stopping cancels the job instead of waiting for its next run
+        await scheduler.stop()
+        assert all(task.cancelled() for task in tasks)
+        assert len(calls) == 1
+
+    asyncio.run(_test())
+
+
+def test_scheduler_interval():
+    calls = []
+
+    async def job():
+        calls.append(asyncio.get_running_loop().time())
+
+    async def _test():
+        scheduler = Scheduler()
+        scheduler.add_job('job', job, 0.05)
+        scheduler.start()
+        await asyncio.sleep(0.22)
+        await scheduler.stop()
+
+    asyncio.run(_test())
+    # Verify runs are spaced out by the interval
+    assert 3 <= len(calls) <= 5
+    assert all(later - earlier >= 0.05 for earlier, later in zip(calls, calls[1:]))
+
+
+def test_scheduler_job_failure():
+    calls = {'failing': 0, 'other': 0}
+
+    async def failing_job():
+        calls['failing'] += 1
+        raise RuntimeError('upstream down')
+
+    async def other_job():
+        calls['other'] += 1
+
+    async def _test():
+        scheduler = Scheduler()
+        scheduler.add_job('failing', failing_job, 0.01)
+        scheduler.add_job('other', other_job, 0.01)
+        scheduler.start()
+        await asyncio.sleep(0.1)
+        # Verify a failed run keeps the job (and the other jobs) scheduled
+        assert all(not task.done() for task in scheduler._tasks)
+        await scheduler.stop()
+
+    asyncio.run(_test())
+    assert calls['failing'] > 1
+    assert calls['other'] > 1
@@ -0,0 +1,28 @@
+from dateutil import parser
+import pytest
+from src.helpers import datetime_UTC
+from src.timestamps import parse_datetime
+
+
+@pytest.mark.parametrize(
+    'value',
+    [
+        # RFC 822 with day of the week and UTC zone name
+        'Wed, 14 May 2025 13:00:02 GMT',
+        # RFC 822 with numeric offset
+        'Wed, 14 May 2025 13:00:02 -0400',
+        # RFC 822 without day of the week or seconds
+        '14 May 2025 13:00 +0130',
+        # RFC 822 with a two-digit year
+        'Wed, 14 May 25 13:00:02 GMT',
+        # ISO 8601 with Z
+        '2025-05-14T13:00:02.123456Z',
+        # EPIC API date (naive, assumed UTC)
+        '2025-05-14 13:00:02',
+        # Falls back to dateutil
+        'May 14th 2025 1pm'
+    ]
+)
+def test_parse_datetime(value: str):
+    # Verify fast paths agree with dateutil
+    assert parse_datetime(value) == datetime_UTC(parser.parse(value))